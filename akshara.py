@@ -0,0 +1,106 @@
+"""
+Devanagari akshara (grapheme cluster) helpers and a cluster-aware edits1
+
+``edits1`` in spell_checker works on raw code points and happily produces
+strings no Hindi word can contain: a matra after another matra, a virama at
+the start of a word, a matra on an independent vowel. ``edits1_akshara``
+generates the same kinds of single edits but only where the result is made of
+well-formed aksharas, and substitutes only within a character class
+(consonant<->consonant, matra<->matra, ...).
+"""
+
+import re
+from typing import Dict, List, Set
+
+CONSONANTS = [chr(c) for c in range(0x0915, 0x093A)] + [chr(c) for c in range(0x0958, 0x0960)]
+VOWELS = ['अ', 'आ', 'इ', 'ई', 'उ', 'ऊ', 'ऋ', 'ए', 'ऐ', 'ओ', 'औ', 'ऑ']
+MATRAS = ['ा', 'ि', 'ी', 'ु', 'ू', 'ृ', 'े', 'ै', 'ो', 'ौ', 'ॉ']
+MODIFIERS = ['ँ', 'ं', 'ः']
+NUKTA = '़'
+VIRAMA = '्'
+DIGITS = [chr(c) for c in range(0x0966, 0x0970)]
+
+_C = '[क-हक़-य़]'
+_V = '[ऄ-औॠॡ]'
+_M = '[ा-ौॢॣ]'
+_D = '[ऀ-ः]'
+AKSHARA = f'(?:{_C}{NUKTA}?(?:{VIRAMA}{_C}{NUKTA}?)*(?:{VIRAMA}|{_M})?{_D}?|{_V}{_D}?|[०-९]|[ऽॐ])'
+_AKSHARA_RE = re.compile(AKSHARA)
+_WORD_RE = re.compile(f'(?:{AKSHARA})+')
+
+_CLASS: Dict[str, str] = {}
+for _cls, _chars in (('C', CONSONANTS), ('V', VOWELS), ('M', MATRAS), ('D', MODIFIERS),
+                     ('N', [NUKTA]), ('H', [VIRAMA]), ('0', DIGITS)):
+    for _ch in _chars:
+        _CLASS[_ch] = _cls
+_MEMBERS = {'C': CONSONANTS, 'V': VOWELS, 'M': MATRAS, 'D': MODIFIERS, '0': DIGITS}
+
+
+def char_class(ch: str) -> str:
+    """One of C, V, M, D, N (nukta), H (virama), 0 (digit); '' for anything else."""
+    return _CLASS.get(ch, '')
+
+
+_DEVANAGARI_RE = re.compile(r'[\u0900-\u097F]+')
+
+
+def is_devanagari(word: str) -> bool:
+    """True if every character is in the Devanagari block, i.e. reachable by Hindi edits."""
+    return _DEVANAGARI_RE.fullmatch(word) is not None
+
+
+def split_aksharas(word: str) -> List[str]:
+    """Split ``word`` into aksharas; stray code points become single-character clusters."""
+    out = []
+    i = 0
+    while i < len(word):
+        m = _AKSHARA_RE.match(word, i)
+        end = m.end() if m else i + 1
+        out.append(word[i:end])
+        i = end
+    return out
+
+
+def is_well_formed(word: str) -> bool:
+    return _WORD_RE.fullmatch(word) is not None
+
+
+def _insertable(prev: str, nxt: str) -> List[str]:
+    """Characters that can go between ``prev`` and ``nxt`` and keep both neighbours well formed."""
+    p, n = char_class(prev), char_class(nxt)
+    dependent_next = n in ('N', 'H', 'M')
+    out = list(CONSONANTS)
+    if not dependent_next and p != 'H':
+        out += VOWELS
+    if p in ('C', 'N') and not dependent_next:
+        out += MATRAS
+        if n != 'D':
+            out.append(VIRAMA)
+    if p in ('C', 'N', 'M', 'V') and not dependent_next and n != 'D':
+        out += MODIFIERS
+    if p == 'C' and n != 'N' and prev < 'क़':
+        out.append(NUKTA)
+    return out
+
+
+def edits1_akshara(word: str) -> Set[str]:
+    """Well-formed strings one insert/delete/same-class replace/transpose away from ``word``."""
+    out = set()
+    for i in range(len(word) + 1):
+        L, R = word[:i], word[i:]
+        prev = L[-1] if L else ''
+        nxt = R[0] if R else ''
+        for c in _insertable(prev, nxt):
+            out.add(L + c + R)
+        if not R:
+            continue
+        cand = L + R[1:]
+        if cand and is_well_formed(cand):
+            out.add(cand)
+        for c in _MEMBERS.get(char_class(R[0]), ()):
+            out.add(L + c + R[1:])
+        if len(R) > 1 and R[0] != R[1]:
+            cand = L + R[1] + R[0] + R[2:]
+            if is_well_formed(cand):
+                out.add(cand)
+    return out
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: bit-parallel levenshtein_distance vs. the original full-matrix version
+
+Usage:
+    python bench_distance.py [--pairs 2000] [--repeat 5] [--maxdist 2] [--index index.pkl]
+
+Word pairs are sampled from index.pkl when it exists (otherwise random Devanagari
+strings) and each pair is checked for identical results before timing.
+"""
+
+import argparse
+import random
+import time
+
+from data_loader import load_index
+from spell_checker import hindi_letters, levenshtein_distance
+
+
+def levenshtein_distance_dp(s1, s2):
+    """The original list-of-lists implementation, kept as the reference."""
+    len1, len2 = len(s1), len(s2)
+    dp = [[0]*(len2+1) for _ in range(len1+1)]
+    for i in range(len1+1):
+        dp[i][0] = i
+    for j in range(len2+1):
+        dp[0][j] = j
+    for i in range(1, len1+1):
+        for j in range(1, len2+1):
+            cost = 0 if s1[i-1] == s2[j-1] else 1
+            dp[i][j] = min(
+                dp[i-1][j] + 1,
+                dp[i][j-1] + 1,
+                dp[i-1][j-1] + cost
+            )
+            if i > 1 and j > 1 and s1[i-1] == s2[j-2] and s1[i-2] == s2[j-1]:
+                dp[i][j] = min(dp[i][j], dp[i-2][j-2] + cost)
+    return dp[len1][len2]
+
+
+def sample_pairs(n, index_path, seed=0):
+    rng = random.Random(seed)
+    vocab = [w for w in load_index(index_path) if len(w) > 1]
+    if not vocab:
+        letters = [c for c in hindi_letters if len(c) == 1]
+        vocab = [''.join(rng.choice(letters) for _ in range(rng.randint(2, 10))) for _ in range(5000)]
+    pairs = []
+    for _ in range(n):
+        a = rng.choice(vocab)
+        # half the pairs are near misses, half unrelated words
+        if rng.random() < 0.5:
+            b = list(a)
+            i = rng.randrange(len(b))
+            b[i] = rng.choice(hindi_letters[11:44])
+            b = ''.join(b)
+        else:
+            b = rng.choice(vocab)
+        pairs.append((a, b))
+    return pairs
+
+
+def best_of(fn, pairs, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(pairs)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pairs', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--maxdist', type=int, default=2)
+    parser.add_argument('--index', default='index.pkl')
+    args = parser.parse_args()
+
+    pairs = sample_pairs(args.pairs, args.index)
+    k = args.maxdist
+    for a, b in pairs:
+        ref = levenshtein_distance_dp(a, b)
+        assert levenshtein_distance(a, b) == ref, (a, b)
+        assert levenshtein_distance(a, b, k) == (ref if ref <= k else k + 1), (a, b)
+
+    timings = {
+        'dp (original)': best_of(lambda ps: [levenshtein_distance_dp(a, b) for a, b in ps], pairs, args.repeat),
+        'bit-parallel': best_of(lambda ps: [levenshtein_distance(a, b) for a, b in ps], pairs, args.repeat),
+        f'bit-parallel, max_distance={k}': best_of(lambda ps: [levenshtein_distance(a, b, k) for a, b in ps], pairs, args.repeat),
+    }
+    base = timings['dp (original)']
+    print(f"{len(pairs)} pairs, best of {args.repeat} runs (results verified identical)")
+    for name, dt in timings.items():
+        print(f"  {name:<32} {dt * 1e6 / len(pairs):8.2f} us/pair  x{base / dt:5.1f}")
+
+
+if __name__ == '__main__':
+    main()
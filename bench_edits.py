@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Compare code-point edits1/edits2 with akshara-aware edits
+
+Usage:
+    python bench_edits.py [--input input.txt] [--index index.pkl] [--no-edits2]
+
+For every Hindi token of the input that is not in the dictionary, reports the
+number of strings each generator produces, the time spent per word, and how
+often both modes pick the same best correction.
+"""
+
+import argparse
+import re
+import time
+
+from data_loader import load_index
+from spell_checker import EDIT_MODES, edit_function, known
+
+
+def measure(word, word_freq, mode, with_edits2):
+    edit = edit_function(mode)
+    t0 = time.perf_counter()
+    e1 = edit(word)
+    generated = len(e1)
+    found = known(e1, word_freq)
+    if with_edits2 and not found:
+        e2 = set()
+        for w1 in e1:
+            e2 |= edit(w1)
+        generated += len(e2)
+        found = known(e2, word_freq)
+    dt = time.perf_counter() - t0
+    best = max(found, key=lambda c: (word_freq.get(c, 0), c)) if found else None
+    return generated, dt, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--input', default='input.txt')
+    parser.add_argument('--index', default='index.pkl')
+    parser.add_argument('--no-edits2', action='store_true', help='Only measure edits1')
+    args = parser.parse_args()
+
+    word_freq = load_index(args.index)
+    with open(args.input, 'r', encoding='utf-8') as f:
+        words = sorted(set(re.findall(r'[\u0900-\u097F]+', f.read())))
+    words = [w for w in words if w not in word_freq]
+    if not words:
+        print("No unknown words in the input.")
+        return
+
+    totals = {m: [0, 0.0] for m in EDIT_MODES}
+    bests = {m: [] for m in EDIT_MODES}
+    for w in words:
+        for m in EDIT_MODES:
+            generated, dt, best = measure(w, word_freq, m, not args.no_edits2)
+            totals[m][0] += generated
+            totals[m][1] += dt
+            bests[m].append(best)
+
+    n = len(words)
+    print(f"{n} unknown words, {'edits1' if args.no_edits2 else 'edits1 + edits2 on a miss'}")
+    print(f"  {'mode':<10} {'strings/word':>14} {'ms/word':>10}")
+    for m in EDIT_MODES:
+        print(f"  {m:<10} {totals[m][0] / n:14.0f} {totals[m][1] * 1000 / n:10.2f}")
+    same = sum(1 for a, b in zip(bests['codepoint'], bests['akshara']) if a == b)
+    print(f"  same most-frequent candidate in both modes: {same}/{n}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Load-test client for server.py
+
+Usage:
+    python bench_server.py [--socket /tmp/spell.sock | --port 8765] [--input input.txt]
+                           [--requests 1000] [--concurrency 16] [--op check|suggest] [--spawn]
+
+Sends the lines of ``--input`` (or their Devanagari words with ``--op suggest``)
+round-robin as requests over ``--concurrency`` connections and prints
+throughput, client-side p50/p99 latency and the server's own stats. With
+``--spawn`` a server is started for the run and stopped afterwards.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from server import percentile
+
+
+async def _connect(args):
+    if args.socket:
+        return await asyncio.open_unix_connection(args.socket)
+    return await asyncio.open_connection(args.host, args.port)
+
+
+async def _call(reader, writer, req):
+    writer.write((json.dumps(req, ensure_ascii=False) + '\n').encode('utf-8'))
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def _client(args, payloads, counter, latencies, errors):
+    reader, writer = await _connect(args)
+    try:
+        while True:
+            n = counter[0]
+            if n >= args.requests:
+                return
+            counter[0] += 1
+            req = dict(payloads[n % len(payloads)], id=n)
+            t0 = time.perf_counter()
+            resp = await _call(reader, writer, req)
+            latencies.append(time.perf_counter() - t0)
+            if 'error' in resp:
+                errors.append(resp['error'])
+    finally:
+        writer.close()
+
+
+async def run(args, payloads):
+    latencies = []
+    errors = []
+    counter = [0]
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_client(args, payloads, counter, latencies, errors) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - t0
+    reader, writer = await _connect(args)
+    stats = await _call(reader, writer, {'op': 'stats'})
+    writer.close()
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'seconds': round(elapsed, 3),
+        'requests_per_sec': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'server': stats,
+    }
+
+
+def _wait_for_server(args, proc, timeout=300.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("server exited during start-up")
+        try:
+            asyncio.run(_probe(args))
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("server did not start in time")
+
+
+async def _probe(args):
+    reader, writer = await _connect(args)
+    writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--socket', default=None)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--input', default='input.txt')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--op', choices=('check', 'suggest'), default='check')
+    parser.add_argument('--spawn', action='store_true', help='Start server.py for the run')
+    parser.add_argument('--server-args', default='', help='Extra arguments for the spawned server')
+    args = parser.parse_args()
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if args.op == 'check':
+        payloads = [{'op': 'check', 'text': ln} for ln in text.splitlines() if ln.strip()]
+    else:
+        payloads = [{'op': 'suggest', 'word': w} for w in dict.fromkeys(re.findall(r'[\u0900-\u097F]+', text))]
+    if not payloads:
+        print(f"Nothing to send in {args.input}")
+        return
+
+    proc = None
+    if args.spawn:
+        if not args.socket:
+            args.socket = os.path.join(tempfile.mkdtemp(), 'spell.sock')
+        here = os.path.dirname(os.path.abspath(__file__))
+        cmd = [sys.executable, os.path.join(here, 'server.py'), '--socket', args.socket] + args.server_args.split()
+        proc = subprocess.Popen(cmd)
+        _wait_for_server(args, proc)
+    try:
+        print(json.dumps(asyncio.run(run(args, payloads)), indent=2))
+    finally:
+        if proc is not None:
+            proc.send_signal(signal.SIGINT)
+            proc.wait()
+
+
+if __name__ == '__main__':
+    main()
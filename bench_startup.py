@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Cold-start timing for main.py and the file runners
+
+Usage:
+    python bench_startup.py [--index index.pkl] [--corpus titles.txt --cache cache/corpus.json]
+                            [--runs 5] [--budget-ms 1000]
+
+Each entry point is run ``--runs`` times in a fresh interpreter on a
+three-line input, in a scratch directory so main.py's fixed
+``input.txt``/``output.txt`` do not touch the working tree. The index and its
+derived ``index.*.pkl`` files are linked in, so a run measures loading them,
+not building them (``python data_loader.py --prebuild`` builds them all).
+The corpus runners are only timed when ``--corpus`` is given.
+
+Prints the median and fastest wall time per entry point, plus a bare
+interpreter start for reference, and exits 1 if any median is over
+``--budget-ms``.
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SAMPLE = "भारत एक विशाल देश है\nहिंदी भाषा बहुत सुंदर है\nयह एक परीक्षा वाक्य है\n"
+
+
+def _link_index(index, workdir):
+    base = os.path.splitext(os.path.abspath(index))[0]
+    for path in [os.path.abspath(index)] + glob.glob(base + '.*.pkl'):
+        os.symlink(path, os.path.join(workdir, 'index' + os.path.basename(path)[len(os.path.basename(base)):]))
+
+
+def _time(cmd, cwd, runs):
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        times.append((time.perf_counter() - t0) * 1000)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{' '.join(cmd)} failed:\n{proc.stderr.decode('utf-8', 'replace')}")
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--index', default='index.pkl')
+    parser.add_argument('--corpus', default=None, help='Titles file for spell_checker.py and run_spell_check_using_dict.py')
+    parser.add_argument('--cache', default=None, help='JSON word-count cache for the corpus runners')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=1000.0, help='Maximum median start-to-exit time per entry point')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.index):
+        print(f"{args.index} not found. Run data_loader.py first.")
+        sys.exit(1)
+    here = os.path.dirname(os.path.abspath(__file__))
+    py = sys.executable
+    workdir = tempfile.mkdtemp()
+    _link_index(args.index, workdir)
+    with open(os.path.join(workdir, 'input.txt'), 'w', encoding='utf-8') as f:
+        f.write(SAMPLE)
+
+    commands = {
+        'python -c pass': [py, '-c', 'pass'],
+        'main.py': [py, os.path.join(here, 'main.py')],
+        'file_processor.py': [py, os.path.join(here, 'file_processor.py'), 'input.txt', 'fp_out.txt'],
+    }
+    if args.corpus:
+        corpus = ['-c', os.path.abspath(args.corpus)]
+        if args.cache:
+            corpus += ['--cache', os.path.abspath(args.cache)]
+        commands['spell_checker.py'] = [py, os.path.join(here, 'spell_checker.py'), '-i', 'input.txt', '-o', 'sc_out.txt'] + corpus
+        commands['run_spell_check_using_dict.py'] = [py, os.path.join(here, 'run_spell_check_using_dict.py'),
+                                                     '-i', 'input.txt', '-o', 'dict_out.txt'] + corpus
+
+    # one untimed run each, so every derived index and the corpus cache exist before timing
+    for name, cmd in commands.items():
+        _time(cmd, workdir, 1)
+
+    report = {}
+    over = []
+    for name, cmd in commands.items():
+        times = _time(cmd, workdir, args.runs)
+        report[name] = {'median_ms': round(statistics.median(times), 1), 'min_ms': round(min(times), 1)}
+        if name != 'python -c pass' and statistics.median(times) > args.budget_ms:
+            over.append(name)
+    report['budget_ms'] = args.budget_ms
+    report['over_budget'] = over
+    print(json.dumps(report, indent=2))
+    if over:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
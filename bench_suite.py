@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Reproducible end-to-end benchmark on synthetic Hindi misspellings
+
+Usage:
+    python bench_suite.py [--index index.pkl] [--tokens 2000] [--typo-rate 0.3] [--repeat-rate 0.3]
+                          [--distances 1,2,3,4] [--kinds edit,matra,virama,transpose] [--seed 0]
+                          [--entries generate_candidates,process_input_file,...] [--out result.json]
+    python bench_suite.py ... --compare baseline.json [--tolerance 0.1] [--timeout 1800]
+
+Dictionary words are sampled from ``--index`` and a fraction of them is
+corrupted with controlled typos: ``edit`` (1-4 random insert/delete/replace
+operations), ``matra`` (one matra swapped for another), ``virama`` (a virama
+dropped) and ``transpose`` (two neighbouring characters swapped).
+``--repeat-rate`` is the share of tokens that reuse an earlier token, as
+repeated misspellings do in real text. The same seed always gives the same
+workload.
+
+Each entry point runs in its own process, so the reported peak RSS belongs
+to that entry alone. The result is JSON with tokens/sec, per-word latency
+percentiles where they can be measured, and peak RSS. With ``--compare``, each
+entry is checked against a saved result: lower throughput or higher
+p99/RSS beyond ``--tolerance`` is reported as a regression, and the exit
+status is 1. An entry that crashes or runs past ``--timeout`` seconds is
+reported as an error instead of blocking the suite, and counts as a
+regression against a baseline where it ran.
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from queue import Empty
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+import akshara
+from data_loader import load_index
+from server import percentile
+from spell_checker import FALLBACK_KINDS
+
+TYPO_KINDS = ('edit', 'matra', 'virama', 'transpose')
+ENTRIES = ('generate_candidates', 'process_input_file', 'check_file_with_dict', 'semantic')
+WORDS_PER_LINE = 10
+
+_HINDI_WORD = re.compile(r'[\u0900-\u097F]{2,}')
+_LETTERS = akshara.CONSONANTS[:33] + akshara.VOWELS + akshara.MATRAS
+
+
+def _random_edit(word, rng):
+    i = rng.randrange(len(word) + 1)
+    op = rng.choice(('insert', 'delete', 'replace')) if word else 'insert'
+    if op == 'insert' or i == len(word):
+        return word[:i] + rng.choice(_LETTERS) + word[i:]
+    if op == 'delete':
+        return word[:i] + word[i + 1:]
+    return word[:i] + rng.choice(_LETTERS) + word[i + 1:]
+
+
+def make_typo(word, kind, rng, distance=1):
+    """Corrupt ``word`` with one typo of ``kind``; None if the kind does not apply to it."""
+    if kind == 'edit':
+        for _ in range(distance):
+            word = _random_edit(word, rng)
+        return word
+    if kind == 'matra':
+        spots = [i for i, c in enumerate(word) if c in akshara.MATRAS]
+        if not spots:
+            return None
+        i = rng.choice(spots)
+        return word[:i] + rng.choice([m for m in akshara.MATRAS if m != word[i]]) + word[i + 1:]
+    if kind == 'virama':
+        spots = [i for i, c in enumerate(word) if c == akshara.VIRAMA]
+        if not spots:
+            return None
+        i = rng.choice(spots)
+        return word[:i] + word[i + 1:]
+    if kind == 'transpose':
+        spots = [i for i in range(len(word) - 1) if word[i] != word[i + 1]]
+        if not spots:
+            return None
+        i = rng.choice(spots)
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    raise ValueError(f"unknown typo kind: {kind}")
+
+
+def build_workload(word_freq, tokens=2000, typo_rate=0.3, repeat_rate=0.3, distances=(1, 2, 3, 4),
+                   kinds=TYPO_KINDS, seed=0):
+    """List of tokens: dictionary words, some corrupted, with a share of repeats."""
+    rng = random.Random(seed)
+    vocab = sorted(w for w in word_freq if _HINDI_WORD.fullmatch(w))
+    if not vocab:
+        raise ValueError("the dictionary has no Hindi words to sample from")
+    out = []
+    while len(out) < tokens:
+        if out and rng.random() < repeat_rate:
+            out.append(rng.choice(out))
+            continue
+        word = rng.choice(vocab)
+        if rng.random() < typo_rate:
+            for _ in range(10):
+                typo = make_typo(word, rng.choice(kinds), rng, rng.choice(distances))
+                if typo and typo not in word_freq:
+                    word = typo
+                    break
+        out.append(word)
+    return out
+
+
+def write_lines(tokens, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(0, len(tokens), WORDS_PER_LINE):
+            f.write(' '.join(tokens[i:i + WORDS_PER_LINE]) + '।\n')
+
+
+def _latencies(fn, words):
+    lat = []
+    t0 = time.perf_counter()
+    for w in words:
+        t = time.perf_counter()
+        fn(w)
+        lat.append(time.perf_counter() - t)
+    return time.perf_counter() - t0, len(words), lat
+
+
+def run_entry(name, tokens, args):
+    """Run one entry point; returns ``(seconds, tokens handled, per-word latencies or None)``.
+
+    The word-level entries time each unknown token; the file entries time a
+    whole run over the workload, dictionary loading included.
+    """
+    import spell_checker
+    if name in ('generate_candidates', 'semantic'):
+        import engine
+        word_freq = load_index(args.index)
+        deletes, vocab_index, trie = engine.load_indexes(word_freq, args.index, fallback=args.fallback)
+        ngrams = engine.semantic_ngrams(word_freq, args.index, vocab_index) if name == 'semantic' else None
+        unknown = [w for w in tokens if w not in word_freq]
+
+        def one(word):
+            if name == 'semantic':
+                return engine.rank_candidates(word, word_freq, max_distance=args.maxdist, deletes=deletes,
+                                              vocab_index=vocab_index, use_semantic=True,
+                                              embed_path=args.embeddings, ngrams=ngrams)
+            return spell_checker.generate_candidates(word, word_freq, max_distance=args.maxdist, deletes=deletes,
+                                                     vocab_index=vocab_index)
+
+        return _latencies(one, unknown)
+
+    with tempfile.TemporaryDirectory(prefix='bench_') as workdir, open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull):
+        input_path = os.path.join(workdir, 'input.txt')
+        output_path = os.path.join(workdir, 'output.txt')
+        write_lines(tokens, input_path)
+        t0 = time.perf_counter()
+        if name == 'process_input_file':
+            import file_processor
+            file_processor.process_input_file(input_path, output_path, index_file=args.index, fallback=args.fallback,
+                                              max_distance=args.maxdist)
+        elif name == 'check_file_with_dict':
+            import run_spell_check_using_dict
+            run_spell_check_using_dict.check_file_with_dict(input_path, output_path, args.corpus, cache_path=args.cache,
+                                                            max_distance=args.maxdist, fallback=args.fallback)
+        else:
+            raise ValueError(f"unknown entry: {name}")
+        return time.perf_counter() - t0, len(tokens), None
+
+
+def _child(name, tokens, args, queue):
+    try:
+        seconds, count, lat = run_entry(name, tokens, args)
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+        queue.put((seconds, count, lat, rss, None))
+    except Exception as e:
+        queue.put((None, None, None, None, f"{type(e).__name__}: {e}"))
+
+
+def measure(name, tokens, args):
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_child, args=(name, tokens, args, queue))
+    proc.start()
+    deadline = time.monotonic() + args.timeout
+    while True:
+        try:
+            seconds, count, lat, rss, error = queue.get(timeout=1.0)
+            break
+        except Empty:
+            # a child that crashed or hangs never reports; stop waiting for it
+            if not proc.is_alive():
+                proc.join()
+                return {'error': f"process exited with code {proc.exitcode}"}
+            if time.monotonic() > deadline:
+                proc.terminate()
+                proc.join()
+                return {'error': f"timed out after {args.timeout:g}s"}
+    proc.join()
+    if error:
+        return {'error': error}
+    result = {
+        'seconds': round(seconds, 4),
+        'tokens': count,
+        'tokens_per_sec': round(count / seconds, 1) if seconds else None,
+        'peak_rss_kb': rss,
+    }
+    if lat is not None:
+        lat.sort()
+        for q in (50, 90, 99):
+            result[f'p{q}_ms'] = round(percentile(lat, q) * 1000, 4)
+    return result
+
+
+def compare(current, baseline, tolerance):
+    """Regression messages for entries that got slower or bigger than ``baseline`` allows."""
+    problems = []
+    for name, now in current['entries'].items():
+        before = baseline.get('entries', {}).get(name)
+        if not before or 'error' in before:
+            continue
+        if 'error' in now:
+            problems.append(f"{name}: {now['error']}")
+            continue
+        if before.get('tokens_per_sec') and now['tokens_per_sec'] < before['tokens_per_sec'] * (1 - tolerance):
+            problems.append(f"{name}: tokens/sec {before['tokens_per_sec']} -> {now['tokens_per_sec']}")
+        for key in ('p99_ms', 'peak_rss_kb'):
+            if before.get(key) and now.get(key) and now[key] > before[key] * (1 + tolerance):
+                problems.append(f"{name}: {key} {before[key]} -> {now[key]}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--index', default='index.pkl')
+    parser.add_argument('--corpus', default=os.path.join('hiwiki-latest-all-titles', 'hiwiki-latest-all-titles'))
+    parser.add_argument('--cache', default=os.path.join('output', 'corpus.json'))
+    parser.add_argument('--embeddings', default='embeddings.model')
+    parser.add_argument('--tokens', type=int, default=2000)
+    parser.add_argument('--typo-rate', type=float, default=0.3)
+    parser.add_argument('--repeat-rate', type=float, default=0.3)
+    parser.add_argument('--distances', default='1,2,3,4')
+    parser.add_argument('--kinds', default=','.join(TYPO_KINDS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--maxdist', type=int, default=4)
+    parser.add_argument('--fallback', choices=FALLBACK_KINDS, default='scan')
+    parser.add_argument('--entries', default=','.join(ENTRIES))
+    parser.add_argument('--out', default=None, help='Write the JSON result here as well as to stdout')
+    parser.add_argument('--compare', default=None, help='Baseline JSON written by an earlier run')
+    parser.add_argument('--tolerance', type=float, default=0.10)
+    parser.add_argument('--timeout', type=float, default=1800, help='Seconds to wait for one entry before giving up on it')
+    args = parser.parse_args()
+
+    word_freq = load_index(args.index)
+    if not word_freq:
+        print(f"Error: {args.index} not found. Run data_loader.py first.")
+        sys.exit(2)
+    kinds = [k for k in args.kinds.split(',') if k]
+    for k in kinds:
+        if k not in TYPO_KINDS:
+            parser.error(f"unknown typo kind: {k}")
+    tokens = build_workload(word_freq, tokens=args.tokens, typo_rate=args.typo_rate, repeat_rate=args.repeat_rate,
+                            distances=[int(d) for d in args.distances.split(',')], kinds=kinds, seed=args.seed)
+
+    result = {
+        'workload': {
+            'index': args.index, 'tokens': len(tokens), 'unique': len(set(tokens)),
+            'unknown': sum(1 for w in tokens if w not in word_freq), 'typo_rate': args.typo_rate,
+            'repeat_rate': args.repeat_rate, 'distances': args.distances, 'kinds': kinds, 'seed': args.seed,
+            'maxdist': args.maxdist, 'fallback': args.fallback,
+        },
+        'entries': {},
+    }
+    for name in args.entries.split(','):
+        if name not in ENTRIES:
+            parser.error(f"unknown entry: {name}")
+        result['entries'][name] = measure(name, tokens, args)
+        if 'error' in result['entries'][name]:
+            print(f"{name} failed: {result['entries'][name]['error']}", file=sys.stderr)
+
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    print(text)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('workload') != result['workload']:
+            print("Warning: the baseline was recorded with a different workload", file=sys.stderr)
+        problems = compare(result, baseline, args.tolerance)
+        for p in problems:
+            print(f"REGRESSION {p}", file=sys.stderr)
+        if problems:
+            sys.exit(1)
+        print(f"No regressions against {args.compare} (tolerance {args.tolerance:.0%})", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Bigram counts for context-aware ranking (``--context``)
+
+``data_loader.py --bigrams`` counts adjacent token pairs in the title files.
+Each pair is reduced to a 64-bit key (the crc32 of each word), and the store keeps two parallel arrays:
+sorted uint64 keys and uint32 counts. A lookup is one hash and one binary
+search. At 12 bytes per pair, ``max_entries`` fixes the memory budget. Rare
+pairs are pruned while counting so the Counter stays bounded too, then pruned
+again to fit the budget. ``min_count`` records the smallest count that
+survived.
+
+``rerank_in_context`` reorders a word's candidates by how often each one
+follows the previous word and precedes the next word of the line. The bonus
+is ``weight * log10(1 + count)`` edits: ten sightings in context are worth
+one edit of distance. Candidates never seen in context keep their order.
+"""
+
+import math
+import os
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+from zlib import crc32
+
+import derived_cache
+
+MAX_ENTRIES = 1000000
+KIND = 'bigrams'
+
+
+def pair_key(a: str, b: str) -> int:
+    # crc32 of each word, high and low half; a collision needs both words to collide
+    return _word_hash(a) << 32 | _word_hash(b)
+
+
+def _floor_for(counts: Counter, max_entries: int) -> int:
+    """Smallest count ``c`` such that at most ``max_entries`` pairs have a count of ``c`` or more."""
+    histogram = Counter(counts.values())
+    kept = 0
+    for c in sorted(histogram, reverse=True):
+        if kept + histogram[c] > max_entries:
+            return c + 1
+        kept += histogram[c]
+    return 1
+
+
+def _prune(counts: Counter, floor: int):
+    for k in [k for k, c in counts.items() if c < floor]:
+        del counts[k]
+
+
+def count_pairs(token_lists: Iterable[List[str]], max_entries: int = MAX_ENTRIES) -> Tuple[Counter, int]:
+    """``(pair_key counts, floor)``; pairs rarer than ``floor`` were pruned to keep memory bounded."""
+    counts = Counter()
+    floor = 1
+    for tokens in token_lists:
+        for a, b in zip(tokens, tokens[1:]):
+            counts[pair_key(a, b)] += 1
+        if len(counts) > 4 * max_entries:
+            floor = max(floor, _floor_for(counts, 2 * max_entries))
+            _prune(counts, floor)
+    floor = max(floor, _floor_for(counts, max_entries))
+    _prune(counts, floor)
+    return counts, floor
+
+
+class BigramStore:
+
+    def __init__(self, keys: array = None, counts: array = None, min_count: int = 1):
+        self.keys = keys if keys is not None else array('Q')
+        self.counts = counts if counts is not None else array('I')
+        self.min_count = min_count
+
+    @classmethod
+    def from_counts(cls, counts: Counter, min_count: int = 1) -> 'BigramStore':
+        keys = sorted(counts)
+        return cls(array('Q', keys), array('I', (min(counts[k], 0xFFFFFFFF) for k in keys)), min_count)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def count(self, a: str, b: str) -> int:
+        """How often ``b`` followed ``a`` (0 if never, or too rarely to be kept)."""
+        return self.get(pair_key(a, b))
+
+    def get(self, key: int) -> int:
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.counts[i]
+        return 0
+
+
+def _word_hash(word: Optional[str]) -> Optional[int]:
+    return None if word is None else crc32(word.encode('utf-8'))
+
+
+def rerank_in_context(cands, left: Optional[str], right: Optional[str], store: BigramStore, weight: float = 1.0):
+    """``(cand, dist, freq)`` candidates reordered by their bigram counts with the neighbouring words.
+
+    The result has the type of ``cands``, so a ``spell_checker.Truncated`` list stays one.
+    """
+    if left is None and right is None:
+        return cands
+    # the pair keys share the neighbours' halves, so hash each word once
+    lh, rh = _word_hash(left), _word_hash(right)
+    seen = []
+    for cand in cands:
+        ch = crc32(cand[0].encode('utf-8'))
+        n = 0
+        if lh is not None:
+            n += store.get(lh << 32 | ch)
+        if rh is not None:
+            n += store.get(ch << 32 | rh)
+        seen.append(n)
+    if not any(seen):
+        return cands
+    scored = sorted((cand[1] - weight * math.log10(1 + n), pos, cand) for pos, (cand, n) in enumerate(zip(cands, seen)))
+    return type(cands)(cand for _, _, cand in scored)
+
+
+def build(token_lists: Iterable[List[str]], index_path: str, max_entries: int = MAX_ENTRIES) -> BigramStore:
+    """Count the pairs of ``token_lists`` and persist the store next to ``index_path``."""
+    counts, floor = count_pairs(token_lists, max_entries)
+    store = BigramStore.from_counts(counts, floor)
+    derived_cache.save(derived_cache.derived_path(index_path, KIND), store, source_path=index_path)
+    return store
+
+
+def load(index_path: str) -> Optional[BigramStore]:
+    """The store built for the current ``index_path``, or None if it is missing or stale."""
+    if not index_path or not os.path.exists(index_path):
+        return None
+    return derived_cache.load(derived_cache.derived_path(index_path, KIND), source_path=index_path)
@@ -0,0 +1,95 @@
+"""
+BK-tree over the dictionary vocabulary
+
+Answers "all words within distance <= max_distance" for the fallback scan in
+``generate_candidates`` by visiting only the subtrees the triangle inequality
+allows. The tree is keyed on unrestricted Damerau-Levenshtein distance (a true
+metric, never larger than ``levenshtein_distance``), and hits are then checked
+against ``levenshtein_distance`` so ``--maxdist`` keeps its meaning.
+"""
+
+from typing import Iterable, List, Tuple
+
+import derived_cache
+from spell_checker import DeadlineExceeded, damerau_levenshtein_distance, expired, levenshtein_distance
+
+
+def _metric(a: str, b: str, osa: int) -> int:
+    # DL <= OSA, and both are bounded below by the length difference, so the
+    # cheap bit-parallel OSA value is already exact in the common cases
+    if osa <= 1 or osa == abs(len(a) - len(b)):
+        return osa
+    return damerau_levenshtein_distance(a, b)
+
+
+class BKTree:
+
+    def __init__(self, words: Iterable[str] = ()):
+        # node: [word, {distance: child node}]
+        self.root = None
+        self.size = 0
+        for w in words:
+            self.add(w)
+
+    def add(self, word: str):
+        if self.root is None:
+            self.root = [word, {}]
+            self.size = 1
+            return
+        node = self.root
+        while True:
+            d = _metric(word, node[0], levenshtein_distance(word, node[0]))
+            if d == 0:
+                return
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = [word, {}]
+                self.size += 1
+                return
+            node = child
+
+    def search(self, word: str, max_distance: int, deadline=None) -> List[Tuple[str, int]]:
+        """Return ``(candidate, levenshtein_distance)`` for every word within ``max_distance``.
+
+        Past ``deadline``, DeadlineExceeded carries the words found so far.
+        """
+        found = []
+        if self.root is None:
+            return found
+        stack = [self.root]
+        while stack:
+            # every node costs a full distance, so the clock check is cheap next to it
+            if expired(deadline):
+                raise DeadlineExceeded(found)
+            cand, children = stack.pop()
+            exact = levenshtein_distance(word, cand)
+            if exact <= max_distance:
+                found.append((cand, exact))
+            d = _metric(word, cand, exact)
+            lo, hi = d - max_distance, d + max_distance
+            for k, child in children.items():
+                if lo <= k <= hi:
+                    stack.append(child)
+        return found
+
+
+def load_or_build(word_freq, source_path: str) -> BKTree:
+    """Load the tree persisted next to ``source_path``, rebuilding it if stale."""
+    return derived_cache.load_or_build(
+        'bktree', source_path, lambda: BKTree(sorted(word_freq)), vocab_size=len(word_freq))
+
+
+def patch(word_freq, source_path: str, old_stamp, old_vocab_size: int, added: Iterable[str]) -> bool:
+    """Insert new words into the persisted tree; False if there is none for the old dictionary.
+
+    Words cannot be taken out of a BK-tree, so a dictionary that lost words
+    is left to ``load_or_build``.
+    """
+    path = derived_cache.derived_path(source_path, 'bktree')
+    tree = derived_cache.load(path, stamp=old_stamp, vocab_size=old_vocab_size)
+    if tree is None:
+        return False
+    for w in sorted(added):
+        tree.add(w)
+    derived_cache.save(path, tree, source_path=source_path, vocab_size=len(word_freq))
+    return True
@@ -1,37 +1,48 @@
 import os
 from collections import Counter
 import json
-import re
 
 from typing import List, Tuple
 
+import corpus_ingest
+import metrics
+import mmap_dict
+from spell_checker import rank_by_distance
+
 DEFAULT_CORPUS = os.path.join('hiwiki-latest-all-titles', 'hiwiki-latest-all-titles')
 
 
 class CorpusDict:
   
 
-    def __init__(self, corpus_path: str = DEFAULT_CORPUS, cache_path: str = None):
+    def __init__(self, corpus_path: str = DEFAULT_CORPUS, cache_path: str = None, use_mmap: bool = False,
+                 workers: int = 1):
         self.corpus_path = corpus_path
         self.cache_path = cache_path
-        self.word_freq = self._load()
+        self.workers = workers
+        with metrics.timer('corpus.load'):
+            if use_mmap:
+                # read-only word_freq mapped from <cache or corpus>.dict.bin
+                self.word_freq = mmap_dict.load_or_build(self.source_path(), self._load)
+            else:
+                self.word_freq = self._load()
+        self._matrix = None
 
     def _load(self) -> Counter:
         if self.cache_path and os.path.exists(self.cache_path):
             try:
                 with open(self.cache_path, 'r', encoding='utf-8') as cf:
                     data = json.load(cf)
-                return Counter({k: int(v) for k, v in data.items()})
+                # the cache is written from a Counter, so the values are already ints
+                return Counter(data)
             except Exception:
                 pass
 
         if not os.path.exists(self.corpus_path):
             raise FileNotFoundError(f"Corpus file not found: {self.corpus_path}")
 
-        with open(self.corpus_path, 'r', encoding='utf-8') as f:
-            text = f.read()
-        words = re.findall(r'[\u0900-\u097F]+', text)
-        cnt = Counter(words)
+        # counted chunk by chunk, in ``workers`` processes, with bounded memory
+        cnt = corpus_ingest.count_words(self.corpus_path, workers=self.workers, progress=corpus_ingest.print_progress)
 
         if self.cache_path:
             try:
@@ -52,7 +63,19 @@ class CorpusDict:
     def vocab(self) -> List[str]:
         return list(self.word_freq.keys())
 
+    def source_path(self) -> str:
+        """File the derived indexes are stamped against: the JSON cache when there is one, else the corpus."""
+        return self.cache_path if self.cache_path and os.path.exists(self.cache_path) else self.corpus_path
+
+    def vocab_matrix(self):
+        if self._matrix is None:
+            import vocab_matrix
+            self._matrix = vocab_matrix.VocabMatrix(self.word_freq)
+        return self._matrix
+
+    def nearest(self, word: str, max_distance: int, n: int = 5) -> List[Tuple[str, int, int]]:
+        """Top ``n`` vocabulary words within ``max_distance``, scored in batches with NumPy."""
+        return self.vocab_matrix().candidates(word, max_distance)[:n]
+
     def top_n_candidates(self, candidates: List[Tuple[str, int]], n: int = 5) -> List[Tuple[str, int, int]]:
-        enriched = [(c, d, self.frequency(c)) for c, d in candidates]
-        enriched.sort(key=lambda x: (x[1], -x[2], x[0]))
-        return enriched[:n]
+        return rank_by_distance(dict(candidates), self.word_freq, top_n=n)
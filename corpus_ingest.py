@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Chunked, parallel word counting for large corpus files
+
+``CorpusDict`` and ``load_hindi_corpus`` used to read the whole corpus into
+one string and run a single ``re.findall`` over it, so peak memory was a few
+times the file size and only one core did the work. Here the file is split
+into chunks of about ``CHUNK_BYTES`` that end on line boundaries. Each chunk
+is scanned straight from a read-only mmap with a bytes pattern matching the
+UTF-8 encoding of U+0900-U+097F, which gives the same words as the old
+pattern without decoding the text. Each chunk produces its own Counter, one
+chunk per process with ``workers > 1``. The Counters are merged in file
+order, so words keep their order of first appearance. Memory is bounded by
+the vocabulary, not by the file size.
+
+The result is the same Counter as before, and the JSON cache format is
+unchanged. To build the cache for a full dump ahead of time:
+
+    python corpus_ingest.py hiwiki-latest-pages-articles.txt --cache cache/corpus.json --workers 4
+"""
+
+import mmap
+import os
+import re
+import sys
+from collections import Counter
+from typing import Callable, List, Tuple
+
+CHUNK_BYTES = 32 * 1024 * 1024
+# a chunk is scanned in windows of this size so the token list of one findall stays small
+SCAN_BYTES = 1024 * 1024
+
+# one or more UTF-8 encoded code points in U+0900-U+097F (E0 A4 80 .. E0 A5 BF)
+_WORD_RE = re.compile(rb'(?:\xe0[\xa4\xa5][\x80-\xbf])+')
+
+
+def chunk_ranges(path: str, chunk_bytes: int = CHUNK_BYTES) -> List[Tuple[int, int]]:
+    """``(start, end)`` byte ranges of about ``chunk_bytes`` covering ``path``, each ending after a newline."""
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, 'rb') as f:
+        start = 0
+        while start < size:
+            end = min(start + chunk_bytes, size)
+            if end < size:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def count_range(path: str, start: int, end: int) -> Counter:
+    """Devanagari word counts (as UTF-8 bytes) of one byte range of ``path``."""
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        counts = Counter()
+        pos = start
+        while pos < end:
+            stop = mm.find(b'\n', min(pos + SCAN_BYTES, end), end) + 1 or end
+            counts.update(_WORD_RE.findall(mm, pos, stop))
+            pos = stop
+        return counts
+    finally:
+        mm.close()
+
+
+def _count_range(args):
+    return count_range(*args)
+
+
+def count_words(path: str, workers: int = 1, chunk_bytes: int = CHUNK_BYTES,
+                progress: Callable[[int, int], None] = None) -> Counter:
+    """Counter of the Devanagari words of ``path``, in order of first appearance.
+
+    ``progress(done_bytes, total_bytes)`` is called after each chunk when there is more than one.
+    """
+    ranges = chunk_ranges(path, chunk_bytes)
+    total_bytes = ranges[-1][1] if ranges else 0
+    if len(ranges) < 2:
+        progress = None
+    merged = Counter()
+    if workers > 1 and len(ranges) > 1:
+        import multiprocessing
+        with multiprocessing.Pool(min(workers, len(ranges))) as pool:
+            # imap keeps chunk order, and with it the order of first appearance
+            parts = pool.imap(_count_range, [(path, s, e) for s, e in ranges])
+            for (_, end), part in zip(ranges, parts):
+                merged.update(part)
+                if progress:
+                    progress(end, total_bytes)
+    else:
+        for start, end in ranges:
+            merged.update(count_range(path, start, end))
+            if progress:
+                progress(end, total_bytes)
+    return Counter({w.decode('utf-8'): n for w, n in merged.items()})
+
+
+def print_progress(done: int, total: int):
+    """``progress`` callback that reports on stderr, leaving stdout to the report."""
+    print(f"Counted {done / 1e6:.0f} of {total / 1e6:.0f} MB ({100.0 * done / total:.0f}%)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser(description="Count the Devanagari words of a large corpus into the JSON cache")
+    parser.add_argument('corpus', help='Text or titles file')
+    parser.add_argument('--cache', required=True, help='JSON cache to write (the --cache of the corpus runners)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Processes counting chunks')
+    parser.add_argument('--chunk-mb', type=float, default=CHUNK_BYTES / 1024 / 1024, help='Approximate chunk size')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    counts = count_words(args.corpus, workers=args.workers, chunk_bytes=int(args.chunk_mb * 1024 * 1024),
+                         progress=print_progress)
+    if os.path.dirname(args.cache):
+        os.makedirs(os.path.dirname(args.cache), exist_ok=True)
+    with open(args.cache, 'w', encoding='utf-8') as cf:
+        json.dump(dict(counts), cf, ensure_ascii=False)
+    print(f"{len(counts)} distinct words, {sum(counts.values())} tokens in {time.perf_counter() - t0:.1f}s -> {args.cache}")
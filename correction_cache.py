@@ -0,0 +1,102 @@
+"""
+Two-level cache of corrections for misspelled words
+
+Level 1 is a bounded in-process LRU; level 2 is an optional sqlite file that
+survives across runs. Entries live under a namespace derived from the
+dictionary file's size/mtime and the ranking parameters, so rebuilding
+``index.pkl`` or changing ``max_distance`` / ``use_semantic`` / ``sem_weight``
+makes old entries invisible. Several configurations can share one store:
+each keeps its own entries, and when the store is opened with more than
+``max_rows`` entries the oldest ones, of any namespace, are dropped.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+import derived_cache
+
+DB_MAX_ROWS = 1000000
+
+
+def cache_namespace(dict_path: str, **params) -> str:
+    key = json.dumps([derived_cache.source_stamp(dict_path) if dict_path else None, sorted(params.items())])
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+class CorrectionCache:
+
+    def __init__(self, namespace: str = '', max_size: int = 10000, path: str = None, max_rows: int = DB_MAX_ROWS):
+        self.namespace = namespace
+        self.max_size = max_size
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lru = OrderedDict()
+        self._db = None
+        if path:
+            import sqlite3
+            self._db = sqlite3.connect(path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS corrections ("
+                "namespace TEXT NOT NULL, word TEXT NOT NULL, value TEXT NOT NULL, "
+                "stored REAL NOT NULL DEFAULT 0, PRIMARY KEY (namespace, word))")
+            if 'stored' not in [row[1] for row in self._db.execute("PRAGMA table_info(corrections)")]:
+                # stores written before entries were timestamped count as the oldest
+                self._db.execute("ALTER TABLE corrections ADD COLUMN stored REAL NOT NULL DEFAULT 0")
+            self._db.execute("CREATE INDEX IF NOT EXISTS corrections_stored ON corrections (stored)")
+            self._evict(max_rows)
+            self._db.commit()
+
+    def _evict(self, max_rows: int):
+        """Drop the oldest entries, of any namespace, beyond ``max_rows``."""
+        (count,) = self._db.execute("SELECT COUNT(*) FROM corrections").fetchone()
+        if count > max_rows:
+            self._db.execute(
+                "DELETE FROM corrections WHERE rowid IN "
+                "(SELECT rowid FROM corrections ORDER BY stored LIMIT ?)", (count - max_rows,))
+
+    def get(self, word):
+        """Return the cached value for ``word`` or None, counting a hit or miss."""
+        value = self._lru.get(word)
+        if value is not None:
+            self._lru.move_to_end(word)
+            self.hits += 1
+            return value
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT value FROM corrections WHERE namespace = ? AND word = ?",
+                (self.namespace, word)).fetchone()
+            if row is not None:
+                value = json.loads(row[0])
+                self._remember(word, value)
+                self.hits += 1
+                return value
+        self.misses += 1
+        return None
+
+    def put(self, word, value, persist=True):
+        """Cache ``value``; ``persist=False`` keeps it out of the sqlite store."""
+        self._remember(word, value)
+        if persist and self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO corrections (namespace, word, value, stored) VALUES (?, ?, ?, ?)",
+                (self.namespace, word, json.dumps(value, ensure_ascii=False), time.time()))
+
+    def _remember(self, word, value):
+        self._lru[word] = value
+        self._lru.move_to_end(word)
+        if len(self._lru) > self.max_size:
+            self._lru.popitem(last=False)
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = 100.0 * self.hits / total if total else 0.0
+        return f"Correction cache: {self.hits} hits, {self.misses} misses ({rate:.1f}% hit rate)"
+
+    def close(self):
+        if self._db is not None:
+            self._db.commit()
+            self._db.close()
+            self._db = None
@@ -1,33 +1,56 @@
 import re
 from collections import Counter
+import hashlib
+import json
 import pickle
 import os
 
-def load_titles(file_path):
-    titles = []
+import bigram_store
+import bk_tree
+import deletion_index
+import derived_cache
+import mmap_dict
+import ngram_index
+import phonetic_index
+
+_PARENS_RE = re.compile(r'\([^)]*\)')
+_TOKEN_RE = re.compile(r'[\u0900-\u097F]+|[\w]+')
+
+
+def iter_titles(file_path):
+    """Yield titles one by one, so a large dump is never held in memory."""
     with open(file_path, 'r', encoding='utf-8') as f:
         for line in f:
             line = line.strip()
-            if line and not line.startswith('page_title'):   
+            if line and not line.startswith('page_title'):
                 parts = line.split('\t')
                 if len(parts) > 1:
-                    title = parts[1]
+                    yield parts[1]
                 else:
-                    title = parts[0]
-                titles.append(title)
-    return titles
+                    yield parts[0]
+
+def load_titles(file_path):
+    return list(iter_titles(file_path))
+
+def title_tokens(title):
+    title = _PARENS_RE.sub('', title.replace('_', ' '))
+    return [token for token in _TOKEN_RE.findall(title) if len(token) > 1 and not token.isdigit()]
 
 def tokenize_titles(titles):
      
     words = []
     for title in titles:
-        title = title.replace('_', ' ')
-        title = re.sub(r'\([^)]*\)', '', title)
-        tokens = re.findall(r'[\u0900-\u097F]+|[\w]+', title)
-        tokens = [token for token in tokens if len(token) > 1 and not token.isdigit()]
-        words.extend(tokens)
+        words.extend(title_tokens(title))
     return words
 
+def count_titles(titles, counts=None):
+    """Stream the tokens of ``titles`` into ``counts`` (a new Counter by default)."""
+    if counts is None:
+        counts = Counter()
+    for title in titles:
+        counts.update(title_tokens(title))
+    return counts
+
 def add_common_words():
      
     common_hindi = [
@@ -64,22 +87,190 @@ def save_index(freq_dict, file_path='index.pkl'):
     with open(file_path, 'wb') as f:
         pickle.dump(freq_dict, f)
 
-def load_index(file_path='index.pkl'):
-    if os.path.exists(file_path):
-        with open(file_path, 'rb') as f:
-            return pickle.load(f)
-    return {}
+def load_index(file_path='index.pkl', use_mmap=False):
+    """The pickled Counter, or with ``use_mmap`` a read-only ``mmap_dict.MmapDict`` of it."""
+    if not os.path.exists(file_path):
+        return {}
+    if use_mmap:
+        return mmap_dict.load_or_build(file_path, lambda: load_index(file_path))
+    with open(file_path, 'rb') as f:
+        return derived_cache.load_pickle(f)
+
+# Incremental builds
+#
+# Every title source gets a partial index of raw token counts in
+# ``<index>.parts/``, reused while the source file is unchanged. The merged raw
+# counts (``raw.pkl``) and the list of sources (``manifest.json``) live there
+# too, so adding or removing one source only counts that source and patches
+# the persisted candidate indexes for the words that appeared or disappeared.
+
+def parts_dir(index_path):
+    return os.path.splitext(index_path)[0] + '.parts'
+
+def _partial_path(index_path, source):
+    key = hashlib.sha1(os.path.abspath(source).encode('utf-8')).hexdigest()[:8]
+    return os.path.join(parts_dir(index_path), f"{os.path.basename(source)}-{key}.pkl")
+
+def source_counts(source, index_path='index.pkl'):
+    """Raw token counts of one title file, from its partial index when still fresh."""
+    path = _partial_path(index_path, source)
+    counts = derived_cache.load(path, source_path=source)
+    if counts is not None:
+        print(f"Using cached counts for: {source}")
+        return counts
+    print(f"Loading titles from: {source}")
+    counts = count_titles(iter_titles(source))
+    os.makedirs(parts_dir(index_path), exist_ok=True)
+    derived_cache.save(path, counts, source_path=source)
+    return counts
+
+def merge_counts(partials):
+    total = Counter()
+    for counts in partials:
+        total.update(counts)
+    return total
+
+def load_manifest(index_path='index.pkl'):
+    try:
+        with open(os.path.join(parts_dir(index_path), 'manifest.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)['sources']
+    except (OSError, ValueError, KeyError):
+        return []
+
+def _raw_counts(index_path, sources):
+    raw = derived_cache.load(os.path.join(parts_dir(index_path), 'raw.pkl'), source_path=index_path)
+    if raw is None:
+        raw = merge_counts(source_counts(s, index_path) for s in sources)
+    return raw
+
+def patch_derived(index_path, old_index, old_stamp, new_index):
+    """Patch the persisted candidate indexes for the words that appeared or disappeared.
+
+    When only frequencies changed, the indexes hold the same words and are
+    just re-saved with the new index's stamp. Indexes that cannot be patched
+    (missing, built for another dictionary, or a BK-tree that lost words) are
+    left stale and rebuilt on next use, as is the DAWG; the correction cache
+    is keyed on the index file and starts over.
+    """
+    added = [w for w in new_index if w not in old_index]
+    removed = [w for w in old_index if w not in new_index]
+    old_size = len(old_index)
+    deletion_index.patch(new_index, index_path, old_stamp, old_size, added, removed)
+    ngram_index.patch(new_index, index_path, old_stamp, old_size, added, removed)
+    phonetic_index.patch(new_index, index_path, old_stamp, old_size, added, removed)
+    if not removed:
+        bk_tree.patch(new_index, index_path, old_stamp, old_size, added)
+    return added, removed
+
+def _store(index_path, sources, raw):
+    old_stamp = derived_cache.source_stamp(index_path)
+    old_index = load_index(index_path)
+    freq_dict = build_frequency_dict(raw)
+    save_index(freq_dict, index_path)
+    folder = parts_dir(index_path)
+    os.makedirs(folder, exist_ok=True)
+    derived_cache.save(os.path.join(folder, 'raw.pkl'), raw, source_path=index_path)
+    with open(os.path.join(folder, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump({'sources': sources}, f, ensure_ascii=False, indent=2)
+    if old_index:
+        added, removed = patch_derived(index_path, old_index, old_stamp, freq_dict)
+        print(f"{len(added)} words added, {len(removed)} removed.")
+    return freq_dict
+
+def build_index(paths, index_path='index.pkl'):
+    """Build the index from title files, reusing the partial index of every unchanged file."""
+    sources = [os.path.abspath(p) for p in paths]
+    return _store(index_path, sources, merge_counts(source_counts(s, index_path) for s in sources))
+
+def add_sources(paths, index_path='index.pkl'):
+    """Count only the new title files and add them to the existing index."""
+    sources = load_manifest(index_path)
+    raw = Counter(_raw_counts(index_path, sources))
+    for p in paths:
+        source = os.path.abspath(p)
+        if source in sources:
+            print(f"Already indexed, skipping: {p}")
+            continue
+        raw.update(source_counts(source, index_path))
+        sources.append(source)
+    return _store(index_path, sources, raw)
+
+def build_bigrams(paths, index_path='index.pkl', max_entries=bigram_store.MAX_ENTRIES):
+    """Count adjacent title tokens of ``paths`` into the bigram store of the (already written) index."""
+    def token_lists():
+        for p in paths:
+            print(f"Counting bigrams in: {p}")
+            for title in iter_titles(p):
+                yield title_tokens(title)
+    return bigram_store.build(token_lists(), index_path, max_entries)
+
+def remove_sources(paths, index_path='index.pkl'):
+    """Subtract the partial index of each title file from the existing index."""
+    sources = load_manifest(index_path)
+    raw = Counter(_raw_counts(index_path, sources))
+    for p in paths:
+        source = os.path.abspath(p)
+        if source not in sources:
+            print(f"Not indexed, skipping: {p}")
+            continue
+        counts = derived_cache.load(_partial_path(index_path, source))
+        if counts is None:
+            # the partial is gone; the full build from the rest is the only safe way back
+            sources.remove(source)
+            raw = merge_counts(source_counts(s, index_path) for s in sources)
+            continue
+        raw.subtract(counts)
+        sources.remove(source)
+    return _store(index_path, sources, +raw)
 
 if __name__ == '__main__':
      
+    import argparse
     import sys
     import glob
 
+    parser = argparse.ArgumentParser(description="Build index.pkl from Wikipedia title dumps")
+    parser.add_argument('paths', nargs='*', help="Title files (default: '*all-titles*' files found here)")
+    parser.add_argument('--index', default='index.pkl', help='Index file to write')
+    parser.add_argument('--add', nargs='+', default=[], metavar='PATH', help='Add title files to the existing index')
+    parser.add_argument('--remove', nargs='+', default=[], metavar='PATH', help='Remove title files from the existing index')
+    parser.add_argument('--prebuild', action='store_true',
+                        help='Also build every derived index (deletes, phonetic, ngrams, bktree, dawg) so runs start without building any')
+    parser.add_argument('--bigrams', action='store_true', help='Also count title bigrams for --context ranking')
+    parser.add_argument('--bigram-budget', type=int, default=bigram_store.MAX_ENTRIES,
+                        help='Most bigrams kept (12 bytes each); rarer ones are pruned')
+    args = parser.parse_args()
+
+    def build_extras(freq_dict):
+        if args.bigrams and freq_dict:
+            store = build_bigrams(load_manifest(args.index), args.index, args.bigram_budget)
+            print(f"Bigram store: {len(store)} pairs (count >= {store.min_count}).")
+        if args.prebuild and freq_dict:
+            from engine import prebuild
+            print(f"Derived indexes ready: {', '.join(prebuild(freq_dict, args.index))}")
+
+    if args.add or args.remove:
+        if not load_manifest(args.index):
+            print(f"No incremental build found for {args.index}; build it from the title files first.")
+            sys.exit(1)
+        missing = [p for p in args.add if not os.path.exists(p)]
+        for p in missing:
+            print(f"Warning: path not found, skipping: {p}")
+        freq_dict = None
+        if args.remove:
+            freq_dict = remove_sources(args.remove, args.index)
+        if [p for p in args.add if p not in missing]:
+            freq_dict = add_sources([p for p in args.add if p not in missing], args.index)
+        if freq_dict is not None:
+            print(f"Index updated: {len(freq_dict)} unique words.")
+            build_extras(freq_dict)
+        sys.exit(0)
+
     found = glob.glob('*all-titles*') + glob.glob('**/*all-titles*', recursive=True)
     found = [f for f in sorted(set(found)) if os.path.isfile(f)]
 
-    if len(sys.argv) > 1:
-        paths = sys.argv[1:]
+    if args.paths:
+        paths = args.paths
     else:
         hi = [p for p in found if 'hiwiki' in os.path.basename(p).lower()]
         if hi:
@@ -91,19 +282,17 @@ if __name__ == '__main__':
             print("Example: python data_loader.py hiwiki-latest-all-titles/hiwiki-latest-all-titles")
             sys.exit(1)
 
-    all_titles = []
+    existing = []
     for p in paths:
         if not os.path.exists(p):
             print(f"Warning: path not found, skipping: {p}")
             continue
-        print(f"Loading titles from: {p}")
-        all_titles.extend(load_titles(p))
+        existing.append(p)
 
-    if not all_titles:
+    if not existing:
         print("No titles loaded. Exiting.")
         sys.exit(1)
 
-    words = tokenize_titles(all_titles)
-    freq_dict = build_frequency_dict(words)
-    save_index(freq_dict)
-    print(f"Index built with {len(freq_dict)} unique words.")
\ No newline at end of file
+    freq_dict = build_index(existing, args.index)
+    print(f"Index built with {len(freq_dict)} unique words.")
+    build_extras(freq_dict)
@@ -0,0 +1,137 @@
+"""
+Symmetric-deletion candidate index (SymSpell style)
+
+Every dictionary word is stored under each string obtained by deleting up to
+``max_edit`` characters from it. Two words within edit distance ``max_edit``
+always share at least one such deletion, so candidates for a query come from
+looking up the query's own deletions instead of generating every insert,
+replace and transpose over the Hindi alphabet.
+
+Only all-Devanagari words are indexed: those are the only words edits1/edits2
+over the Hindi alphabet can reach, so Latin entries of the dictionary (the
+common English words) stay confined to the full-vocabulary fallback.
+"""
+
+from typing import Dict, Iterable, List, Set, Tuple, Union
+
+import derived_cache
+from akshara import is_devanagari
+
+
+def deletes(word: str, max_edit: int = 2) -> Set[str]:
+    """Return ``word`` and every string reachable by deleting up to ``max_edit`` characters."""
+    result = {word}
+    frontier = {word}
+    for _ in range(max_edit):
+        nxt = set()
+        for w in frontier:
+            for i in range(len(w)):
+                nxt.add(w[:i] + w[i+1:])
+        nxt -= result
+        if not nxt:
+            break
+        result |= nxt
+        frontier = nxt
+    return result
+
+
+def index_path_for(source_path: str) -> str:
+    """Location of the persisted deletion index kept next to ``source_path``."""
+    return derived_cache.derived_path(source_path, 'deletes')
+
+
+# Buckets holding a single word (most of them) are stored as the bare string and the rest
+# as tuples, which makes the persisted table about twice as fast to unpickle.
+TABLE_LAYOUT = 2
+
+
+class DeletionIndex:
+
+    def __init__(self, table: Dict[str, Union[str, Tuple[str, ...]]], max_edit: int = 2, vocab_size: int = 0):
+        self.table = table
+        self.max_edit = max_edit
+        self.vocab_size = vocab_size
+
+    @classmethod
+    def build(cls, words: Iterable[str], max_edit: int = 2) -> 'DeletionIndex':
+        table: Dict[str, List[str]] = {}
+        n = 0
+        for w in words:
+            n += 1
+            for d in deletes(w, max_edit):
+                bucket = table.get(d)
+                if bucket is None:
+                    table[d] = [w]
+                else:
+                    bucket.append(w)
+        compact = {d: bucket[0] if len(bucket) == 1 else tuple(bucket) for d, bucket in table.items()}
+        return cls(compact, max_edit=max_edit, vocab_size=n)
+
+    def add(self, words: Iterable[str]):
+        for w in words:
+            self.vocab_size += 1
+            for d in deletes(w, self.max_edit):
+                bucket = self.table.get(d)
+                if bucket is None:
+                    self.table[d] = w
+                elif isinstance(bucket, str):
+                    self.table[d] = (bucket, w)
+                else:
+                    self.table[d] = bucket + (w,)
+
+    def remove(self, words: Iterable[str]):
+        for w in words:
+            self.vocab_size -= 1
+            for d in deletes(w, self.max_edit):
+                bucket = self.table.get(d)
+                if bucket == w:
+                    del self.table[d]
+                elif isinstance(bucket, tuple) and w in bucket:
+                    rest = tuple(x for x in bucket if x != w)
+                    self.table[d] = rest[0] if len(rest) == 1 else rest
+
+    def lookup(self, word: str, max_edit: int = None) -> Set[str]:
+        """Dictionary words that share a deletion with ``word``.
+
+        The result is a superset of the words within ``max_edit``; callers
+        verify each one with an exact distance.
+        """
+        if max_edit is None or max_edit > self.max_edit:
+            max_edit = self.max_edit
+        found = set()
+        for d in deletes(word, max_edit):
+            bucket = self.table.get(d)
+            if bucket is None:
+                continue
+            if isinstance(bucket, str):
+                found.add(bucket)
+            else:
+                found.update(bucket)
+        return found
+
+
+def patch(word_freq, source_path: str, old_stamp, old_vocab_size: int, added: Iterable[str], removed: Iterable[str],
+          max_edit: int = 2) -> bool:
+    """Bring the persisted index up to date with a changed dictionary without rebuilding it.
+
+    ``old_stamp`` / ``old_vocab_size`` describe the dictionary the index was
+    built for. Returns False (leaving the rebuild to ``load_or_build``) when
+    there is no index for that dictionary.
+    """
+    path = index_path_for(source_path)
+    index = derived_cache.load(path, stamp=old_stamp, max_edit=max_edit, vocab_size=old_vocab_size, devanagari_only=True,
+                                 layout=TABLE_LAYOUT)
+    if index is None:
+        return False
+    index.remove(w for w in removed if is_devanagari(w))
+    index.add(w for w in added if is_devanagari(w))
+    derived_cache.save(path, index, source_path=source_path, max_edit=max_edit, vocab_size=len(word_freq),
+                       devanagari_only=True, layout=TABLE_LAYOUT)
+    return True
+
+
+def load_or_build(word_freq, source_path: str, max_edit: int = 2) -> DeletionIndex:
+    """Load the index persisted next to ``source_path``, rebuilding it if stale."""
+    return derived_cache.load_or_build(
+        'deletes', source_path, lambda: DeletionIndex.build((w for w in word_freq if is_devanagari(w)), max_edit=max_edit),
+        max_edit=max_edit, vocab_size=len(word_freq), devanagari_only=True, layout=TABLE_LAYOUT)
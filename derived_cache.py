@@ -0,0 +1,83 @@
+"""
+Persistence for structures derived from a dictionary file
+
+Indexes built from ``index.pkl`` or the corpus cache are pickled next to that
+file (``index.<kind>.pkl``) together with the source file's size/mtime and
+the build parameters, and are rebuilt when either no longer matches.
+"""
+
+import gc
+import os
+import pickle
+from typing import Callable, Tuple
+
+FORMAT_VERSION = 1
+
+
+def derived_path(source_path: str, kind: str) -> str:
+    return os.path.splitext(source_path)[0] + f'.{kind}.pkl'
+
+
+def source_stamp(source_path: str) -> Tuple[int, int]:
+    try:
+        st = os.stat(source_path)
+        return st.st_size, st.st_mtime_ns
+    except OSError:
+        return 0, 0
+
+
+def load_pickle(f):
+    """``pickle.load`` with the cyclic collector paused: unpickling a large table
+    allocates hundreds of thousands of containers and would trigger it over and over."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return pickle.load(f)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def save(path: str, obj, source_path: str = None, **params):
+    header = {
+        'version': FORMAT_VERSION,
+        'source': source_stamp(source_path) if source_path else None,
+        'params': params,
+    }
+    with open(path, 'wb') as f:
+        pickle.dump((header, obj), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load(path: str, source_path: str = None, stamp: Tuple[int, int] = None, **params):
+    """Return the stored object, or None if it is missing, unreadable or stale.
+
+    ``stamp`` checks against a recorded size/mtime instead of the current
+    state of ``source_path`` (used when patching for a file just rewritten).
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            header, obj = load_pickle(f)
+    except Exception:
+        return None
+    if header.get('version') != FORMAT_VERSION or header.get('params') != params:
+        return None
+    if stamp is None and source_path:
+        stamp = source_stamp(source_path)
+    if stamp is not None and tuple(header.get('source') or ()) != tuple(stamp):
+        return None
+    return obj
+
+
+def load_or_build(kind: str, source_path: str, build: Callable[[], object], **params):
+    path = derived_path(source_path, kind)
+    obj = load(path, source_path=source_path, **params)
+    if obj is not None:
+        return obj
+    obj = build()
+    try:
+        save(path, obj, source_path=source_path, **params)
+    except Exception:
+        pass
+    return obj
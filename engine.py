@@ -0,0 +1,411 @@
+"""
+A loaded dictionary with its candidate indexes and correction cache, reused across calls
+
+``SpellEngine`` loads ``index.pkl`` (``from_index``) or a titles corpus
+(``from_corpus``) once, together with the deletion index / DAWG / fallback
+index, the embeddings for semantic reranking and a correction cache. The file
+runners are thin wrappers around it, and a long-running caller can keep one
+engine warm for the life of the process:
+
+    engine = SpellEngine.from_index('index.pkl')
+    found = engine.correct_many(words)          # {unknown word: (candidates, display strings)}
+    for result in engine.check_lines(lines):    # check_line() dicts, one per non-blank line
+        ...
+
+Both batch methods look up each distinct unknown word once per batch, through
+the cache and, with ``workers > 1``, a pool of forked processes. With
+``use_context`` the cached candidates of each occurrence are then reordered by
+their bigram counts with the neighbouring words (``bigram_store``).
+"""
+
+import re
+import sys
+import time
+
+import bigram_store
+from correction_cache import CorrectionCache, cache_namespace
+from corpus_dict import CorpusDict
+from data_loader import load_index
+import deletion_index
+import metrics
+import ngram_index
+import parallel
+import phonetic_index
+from semantic_rank import load_embeddings, rerank_candidates
+from spell_checker import Truncated, describe_candidates, generate_candidates, load_vocab_index, operation_type
+
+_WORD_RE = re.compile(r'[\u0900-\u097F]+')
+
+
+def load_indexes(freq_dict, index_file, use_deletes=True, fallback='scan', use_trie=False):
+    """``(deletes, vocab_index, trie)`` for ``generate_candidates``; unused ones are None."""
+    trie = None
+    if use_trie:
+        import trie as trie_module
+        trie = trie_module.load_or_build(freq_dict, index_file)
+    deletes = deletion_index.load_or_build(freq_dict, index_file) if use_deletes and trie is None else None
+    vocab_index = load_vocab_index(fallback, freq_dict, index_file) if trie is None else None
+    return deletes, vocab_index, trie
+
+
+def rank_candidates(word, freq_dict, max_distance=4, deletes=None, vocab_index=None, edits='codepoint', trie=None,
+                    use_semantic=False, embed_path=None, sem_weight=1.0, ngrams=None, top_n=None, phonetic=None,
+                    deadline=None, long_word=None):
+    """Candidates for ``word`` as ``(cand, dist, freq)``, best first; all of them unless ``top_n`` is given.
+
+    A search stopped by ``deadline`` stays a ``Truncated`` list through reranking and slicing.
+    """
+    # semantic reranking can promote any candidate, so it needs the full list
+    cands = generate_candidates(word, freq_dict, max_distance=max_distance, deletes=deletes,
+                                vocab_index=vocab_index, edits=edits, trie=trie,
+                                top_n=None if use_semantic else top_n, phonetic=phonetic,
+                                deadline=deadline, long_word=long_word)
+    truncated = isinstance(cands, Truncated)
+    if use_semantic:
+        model = load_embeddings(embed_path or 'embeddings.model')
+        cands = rerank_candidates(word, cands, model=model, weight_semantic=float(sem_weight), ngrams=ngrams)
+    if top_n is not None:
+        cands = cands[:top_n]
+    return Truncated(cands) if truncated else cands
+
+
+def semantic_ngrams(freq_dict, index_file, vocab_index=None):
+    """Trigram index whose counts give the Jaccard proxy in semantic reranking."""
+    if isinstance(vocab_index, ngram_index.NgramIndex):
+        return vocab_index
+    return ngram_index.load_or_build(freq_dict, index_file)
+
+
+def prebuild(freq_dict, index_file):
+    """Build and persist every derived index of ``index_file`` that is missing or stale,
+    so no run has to build one at startup. Returns the kinds that are now current."""
+    import bk_tree
+    import mmap_dict
+    import trie as trie_module
+    builders = [
+        ('dict.bin', lambda freq_dict, index_file: mmap_dict.load_or_build(index_file, lambda: freq_dict)),
+        ('deletes', deletion_index.load_or_build),
+        ('phonetic', phonetic_index.load_or_build),
+        ('ngrams', ngram_index.load_or_build),
+        ('bktree', bk_tree.load_or_build),
+        ('dawg', trie_module.load_or_build),
+    ]
+    done = []
+    for kind, load_or_build in builders:
+        with metrics.timer(f'prebuild.{kind}'):
+            load_or_build(freq_dict, index_file)
+        done.append(kind)
+    return done
+
+
+def should_apply(best):
+    """``file_processor``'s auto-correction rule for the best ``(cand, dist, freq)``."""
+    if not best:
+        return False
+    return best[1] == 1 or (best[1] == 2 and best[2] >= 200)
+
+
+def flagged_tokens(line, found, apply=should_apply, context=None):
+    """One record per unknown word of ``line``, with its character span and best correction.
+
+    ``found`` maps unknown words to ``(candidates, display strings)`` as
+    returned by ``SpellEngine.correct_many``; other words are skipped.
+    ``context(cands, left, right)`` reorders the candidates of one occurrence
+    given the Devanagari words around it (the left one already corrected, as in ``check_line``).
+    """
+    tokens = []
+    matches = list(_WORD_RE.finditer(line))
+    left = None
+    for j, m in enumerate(matches):
+        word = m.group()
+        entry = found.get(word)
+        if entry is None:
+            left = word
+            continue
+        cands = entry[0]
+        if context is not None and cands:
+            cands = context(cands, left, matches[j + 1].group() if j + 1 < len(matches) else None)
+        best = cands[0] if cands else None
+        left = best[0] if best and apply(best) else word
+        tokens.append({
+            'start': m.start(),
+            'end': m.end(),
+            'word': word,
+            'correction': best[0] if best else None,
+            'dist': best[1] if best else None,
+            'op': operation_type(word, best[0]) if best and best[1] == 1 else None,
+            'freq': best[2] if best else None,
+            'applied': apply(best),
+        })
+        if isinstance(entry[0], Truncated):
+            tokens[-1]['truncated'] = True
+    return tokens
+
+
+def check_line(line_number, line, freq_dict, suggest, context=None, apply=should_apply):
+    """Check one stripped input line; ``suggest(word)`` returns ``(candidates, display strings)``.
+
+    ``context(cands, left, right)`` reorders the candidates of one occurrence
+    given the Devanagari words around it (the left one already corrected).
+    ``apply(best)`` decides whether the best candidate replaces the word.
+    """
+    start_time = time.time()
+
+    with metrics.timer('tokenize'):
+        tokens = [t for t in re.findall(r'[\u0900-\u097F]+|[^\u0900-\u097F]+', line)]
+    if context is not None:
+        word_at = [i for i, t in enumerate(tokens) if _WORD_RE.match(t)]
+        order = {i: k for k, i in enumerate(word_at)}
+
+    misspelled = {}
+    corrected_tokens = tokens[:]
+
+    for idx_tok, tok in enumerate(tokens):
+        leading = ''
+        trailing = ''
+        core = tok
+        while core and not re.match(r'[\u0900-\u097F]', core[0]):
+            leading += core[0]
+            core = core[1:]
+        while core and not re.match(r'[\u0900-\u097F]', core[-1]):
+            trailing = core[-1] + trailing
+            core = core[:-1]
+        if not core:
+            continue
+        word = core
+        metrics.count('words')
+        if word in freq_dict:
+            continue
+        metrics.count('words.unknown')
+
+        cands, display = suggest(word)
+        if context is not None and cands:
+            k = order[idx_tok]
+            with metrics.timer('context'):
+                reranked = context(cands, corrected_tokens[word_at[k - 1]] if k else None,
+                                   tokens[word_at[k + 1]] if k + 1 < len(word_at) else None)
+            if reranked != cands:
+                metrics.count('context.reordered')
+                cands, display = reranked, describe_candidates(word, reranked)
+
+        best = cands[0] if cands else None
+        best_word = best[0] if best else None
+
+        misspelled[word] = display
+
+        if apply(best) and best_word:
+            corrected_tokens[idx_tok] = leading + best_word + trailing
+        else:
+            corrected_tokens[idx_tok] = leading + word + trailing
+
+    corrected_sentence = ''.join(corrected_tokens)
+
+    m = re.search(r'([^\u0900-\u097F\s])\s*$', line)
+    if m:
+        end_punct = m.group(1)
+        if not corrected_sentence.endswith(end_punct):
+            corrected_sentence = corrected_sentence + end_punct
+
+    corrected_sentence = ''.join(corrected_tokens)
+
+    metrics.line_done(line_number, time.time() - start_time)
+    return {
+        'line_number': line_number,
+        'original': line,
+        'corrected': corrected_sentence,
+        'misspelled': misspelled,
+    }
+
+
+class SpellEngine:
+    """Dictionary, indexes and cache loaded once; see the module docstring."""
+
+    def __init__(self, word_freq, source_path=None, use_deletes=True, fallback='scan', edits='codepoint', use_trie=False,
+                 max_distance=4, top_n=5, use_semantic=False, embed_path=None, sem_weight=1.0,
+                 cache=None, cache_db=None, workers=1, use_phonetic=False, use_context=False, context_weight=1.0,
+                 word_budget_ms=None, line_budget_ms=None, long_word=None):
+        self.word_freq = word_freq
+        self.source_path = source_path
+        self.max_distance = max_distance
+        self.top_n = top_n
+        self.edits = edits
+        self.use_semantic = use_semantic
+        self.embed_path = embed_path
+        self.sem_weight = sem_weight
+        self.workers = workers
+        # time budgets (see spell_checker.generate_candidates); the line budget needs workers == 1
+        self.word_budget = word_budget_ms / 1000.0 if word_budget_ms else None
+        self.line_budget = line_budget_ms / 1000.0 if line_budget_ms else None
+        self.long_word = long_word
+        self.truncated = set()
+        self.deletes, self.vocab_index, self.trie = load_indexes(word_freq, source_path, use_deletes=use_deletes,
+                                                                 fallback=fallback, use_trie=use_trie)
+        self.phonetic = phonetic_index.load_or_build(word_freq, source_path) if use_phonetic else None
+        self.ngrams = None
+        self.bigrams = None
+        self.context_weight = context_weight
+        if use_context:
+            self.bigrams = bigram_store.load(source_path)
+            if self.bigrams is None:
+                print("No bigram store for this dictionary; run data_loader.py --bigrams. Ranking without context.",
+                      file=sys.stderr)
+        if use_semantic:
+            # load before any worker is forked so they all share the mapping
+            load_embeddings(embed_path or 'embeddings.model')
+            self.ngrams = semantic_ngrams(word_freq, source_path, self.vocab_index)
+        candidates = 'trie' if use_trie else 'deletes' if use_deletes else edits
+        if use_phonetic:
+            candidates = 'phonetic+' + candidates
+        # identifies the dictionary version and every setting that changes a word's candidates
+        self.namespace = cache_namespace(source_path, max_distance=max_distance, top_n=top_n, candidates=candidates,
+                                         fallback=fallback, use_semantic=bool(use_semantic),
+                                         sem_weight=float(sem_weight), embed_path=embed_path, long_word=long_word)
+        self._owns_cache = cache is None
+        if cache is None:
+            cache = CorrectionCache(self.namespace, path=cache_db)
+        self.cache = cache
+        self._pool = None
+
+    @classmethod
+    def from_index(cls, index_file='index.pkl', use_mmap=False, **options):
+        """Engine over the ``data_loader.py`` dictionary; FileNotFoundError if it is missing or empty.
+
+        ``use_mmap`` opens it as a shared read-only ``mmap_dict.MmapDict`` instead of unpickling it.
+        """
+        with metrics.timer('corpus.load'):
+            word_freq = load_index(index_file, use_mmap=use_mmap)
+        if not word_freq:
+            raise FileNotFoundError("dictionary not found. Run data_loader.py to build the index first.")
+        return cls(word_freq, index_file, **options)
+
+    @classmethod
+    def from_corpus(cls, corpus_path, cache_path=None, use_mmap=False, **options):
+        """Engine over the Devanagari words of a titles corpus (with its optional JSON cache).
+
+        Without a cache the corpus is counted in ``workers`` processes as well.
+        """
+        corpus = CorpusDict(corpus_path, cache_path=cache_path, use_mmap=use_mmap, workers=options.get('workers', 1))
+        return cls(corpus.word_freq, corpus.source_path(), **options)
+
+    def is_known(self, word):
+        return word in self.word_freq
+
+    def compute(self, word, deadline=None):
+        """``(candidates, display strings)`` for ``word``, bypassing the cache.
+
+        The search stops at ``deadline`` or after the word budget, whichever comes first.
+        """
+        if self.word_budget is not None:
+            own = time.perf_counter() + self.word_budget
+            deadline = own if deadline is None else min(deadline, own)
+        cands = rank_candidates(word, self.word_freq, max_distance=self.max_distance, deletes=self.deletes,
+                                vocab_index=self.vocab_index, edits=self.edits, trie=self.trie,
+                                use_semantic=self.use_semantic, embed_path=self.embed_path,
+                                sem_weight=self.sem_weight, ngrams=self.ngrams, top_n=self.top_n,
+                                phonetic=self.phonetic, deadline=deadline, long_word=self.long_word)
+        return cands, describe_candidates(word, cands)
+
+    def _remember(self, word, value):
+        if isinstance(value[0], Truncated):
+            # kept for this run only: another run may have the time to finish the search
+            self.truncated.add(word)
+            self.cache.put(word, value, persist=False)
+        else:
+            self.cache.put(word, value)
+
+    def suggest(self, word):
+        cached = self.cache.get(word)
+        if cached is not None:
+            return cached
+        value = self.compute(word)
+        self._remember(word, value)
+        return value
+
+    def correct_many(self, words, deadline=None):
+        """``{word: (candidates, display strings)}`` for the distinct unknown words among ``words``.
+
+        ``deadline`` bounds the searches of this call when they run in-process (``workers == 1``).
+        """
+        found = {}
+        todo = []
+        for word in words:
+            if word in found or word in self.word_freq:
+                continue
+            cached = self.cache.get(word)
+            found[word] = cached
+            if cached is None:
+                todo.append(word)
+        if todo:
+            if self.workers > 1:
+                if self._pool is None:
+                    self._pool = parallel.SuggestPool(self.compute, self.workers)
+                computed = self._pool.map(todo)
+            else:
+                computed = {w: self.compute(w, deadline) for w in todo}
+            for word, value in computed.items():
+                self._remember(word, value)
+                found[word] = value
+        return found
+
+    def resolve_chunks(self, numbered):
+        """Yield ``(chunk, found)`` per chunk of ``(line number, line)`` pairs, ``found`` covering its unknown words.
+
+        Chunks are single lines with one worker, so output keeps streaming.
+        """
+        size = parallel.CHUNK_LINES if self.workers > 1 else 1
+        for chunk in parallel.chunks(numbered, size):
+            deadline = time.perf_counter() + self.line_budget if self.line_budget is not None and size == 1 else None
+            yield chunk, self.correct_many(parallel.unknown_words((line for _, line in chunk), self.is_known), deadline)
+
+    def in_context(self, cands, left, right):
+        """``cands`` reordered by the bigram store for the words ``left`` and ``right`` (None at line ends)."""
+        return bigram_store.rerank_in_context(cands, left, right, self.bigrams, self.context_weight)
+
+    def check_lines(self, lines, start=1):
+        """``check_line`` results for the non-blank lines of ``lines``, numbered from ``start``."""
+        numbered = ((i, line.strip()) for i, line in enumerate(lines, start))
+        return self.check_numbered((i, line) for i, line in numbered if line)
+
+    def check_numbered(self, numbered):
+        """``check_line`` results for ``(line number, stripped line)`` pairs."""
+        for chunk, found in self.resolve_chunks(numbered):
+            for i, line in chunk:
+                yield self.check_line(i, line, found)
+
+    def check_line(self, line_number, line, found, apply=should_apply):
+        """``check_line`` for one line whose unknown words are in ``found`` (from ``resolve_chunks``)."""
+        context = self.in_context if self.bigrams is not None else None
+        return check_line(line_number, line, self.word_freq, found.__getitem__, context, apply)
+
+    def flag_lines(self, lines, start=1, apply=should_apply):
+        """Yield ``{'line': n, 'tokens': flagged_tokens(...)}`` for the lines of ``lines`` that have unknown words.
+
+        Spans are character offsets into the line without its newline; lines
+        with nothing flagged produce no record.
+        """
+        numbered = ((i, line.rstrip('\n')) for i, line in enumerate(lines, start))
+        context = self.in_context if self.bigrams is not None else None
+        for chunk, found in self.resolve_chunks(numbered):
+            for i, line in chunk:
+                tokens = flagged_tokens(line, found, apply, context)
+                if tokens:
+                    yield {'line': i, 'tokens': tokens}
+
+    def budget_summary(self):
+        """Run-summary line for the words whose search hit a time budget, or None."""
+        if not self.truncated:
+            return None
+        return f"Time budget hit for {len(self.truncated)} words; their suggestions are the best found in time"
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+        if self._owns_cache:
+            self.cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
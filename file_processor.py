@@ -1,124 +1,118 @@
 #!/usr/bin/env python3
 """
 File-based Spell Checker (Hindi)
+
+Lines are read, checked, formatted and written one at a time, so memory does
+not grow with the input; a file name of '-' reads stdin / writes stdout.
+With --workers N the distinct unknown words of each chunk of lines are
+corrected in N forked processes (see parallel.py). The dictionary, indexes and
+correction cache belong to an ``engine.SpellEngine``, which library callers can
+build once and pass in. ``--incremental`` keeps a manifest of per-line results
+next to the report and re-checks only changed lines; ``--watch`` does that
+whenever the input file changes.
 """
 
-from data_loader import load_index
-from spell_checker import generate_candidates, levenshtein_distance, operation_type
-import re
-from semantic_rank import try_load_embeddings, rerank_candidates
-import time
 import os
+import time
 
-
-def process_input_file(input_file='input.txt', output_file='output.txt', use_semantic=False, embed_path=None, sem_weight=1.0):
-
-    print("Loading dictionary...")
-    freq_dict = load_index()
-    if not freq_dict:
-        print("Error: dictionary not found. Run data_loader.py to build the index first.")
-        return
-
-    print(f"Dictionary loaded: {len(freq_dict)} words")
+from engine import SpellEngine
+from incremental import Manifest, manifest_path, results_key, check_lines as check_lines_incremental
+from spell_checker import EDIT_MODES, FALLBACK_KINDS
+import metrics
+import streaming
+
+
+def process_input_file(input_file='input.txt', output_file='output.txt', use_semantic=False, embed_path=None, sem_weight=1.0,
+                       index_file='index.pkl', use_deletes=True, fallback='scan', edits='codepoint', use_trie=False,
+                       max_distance=4, top_n=5,
+                       correction_cache=None, cache_db=None, workers=1, engine=None, output_format='text',
+                       use_phonetic=False, use_mmap=False, use_context=False, context_weight=1.0,
+                       word_budget_ms=None, line_budget_ms=None, long_word=None, incremental=False, watch=None):
+    """Check ``input_file`` and write the report; pass ``engine`` to reuse a loaded ``SpellEngine``.
+
+    ``output_format`` 'jsonl' or 'msgpack' writes ``SpellEngine.flag_lines`` records instead of the text report.
+    ``incremental`` re-checks only the lines changed since the last run (see incremental.py); ``watch``
+    (seconds) keeps doing so every time ``input_file`` changes, until interrupted.
+    """
+
+    print = streaming.status_printer(output_file)
+    own = engine is None
+    if own:
+        print("Loading dictionary...")
+        try:
+            engine = SpellEngine.from_index(index_file, use_deletes=use_deletes, fallback=fallback, edits=edits,
+                                            use_trie=use_trie, max_distance=max_distance, top_n=top_n,
+                                            use_semantic=use_semantic, embed_path=embed_path, sem_weight=sem_weight,
+                                            cache=correction_cache, cache_db=cache_db, workers=workers,
+                                            use_phonetic=use_phonetic, use_mmap=use_mmap,
+                                            use_context=use_context, context_weight=context_weight,
+                                            word_budget_ms=word_budget_ms, line_budget_ms=line_budget_ms,
+                                            long_word=long_word)
+        except FileNotFoundError:
+            print("Error: dictionary not found. Run data_loader.py to build the index first.")
+            return
+    print(f"Dictionary loaded: {len(engine.word_freq)} words")
 
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+        if watch:
+            watch_input(engine, input_file, output_file, watch, output_format, print)
+        else:
+            check_file(engine, input_file, output_file, output_format, print, incremental)
+    finally:
+        if own:
+            engine.close()
+
+
+def check_file(engine, input_file, output_file, output_format='text', print=print, incremental=False):
+    """One pass of ``process_input_file`` with a loaded engine."""
+    manifest = None
+    if incremental:
+        if output_format != 'text' or output_file == '-':
+            print("Incremental checking needs a text report written to a file; checking every line.")
+        else:
+            manifest = Manifest(manifest_path(output_file), results_key(engine))
 
-        if not lines:
-            print(f"Error: {input_file} is empty")
+    try:
+        if output_format != 'text':
+            with streaming.open_input(input_file) as f, streaming.open_records(output_file, output_format) as records:
+                for record in engine.flag_lines(f):
+                    records.write(record)
+            print(f"Records written to: {output_file} ({records.count} lines with misspelled words)")
+            print(engine.cache.summary())
+            if engine.budget_summary():
+                print(engine.budget_summary())
             return
 
-        print(f"Processing {len(lines)} lines from: {input_file}...")
-
-        results = []
-        total_misspelled = 0
-        total_corrections = 0
-
-        for i, line in enumerate(lines, 1):
-            line = line.strip()
-            if not line:
-                continue
-
-            print(f"Processing line {i}: {line[:50]}...")
-
-            start_time = time.time()
-
-            tokens = [t for t in re.findall(r'[\u0900-\u097F]+|[^\u0900-\u097F]+', line)]
-
-            misspelled = {}
-            corrected_tokens = tokens[:]
-
-            for idx_tok, tok in enumerate(tokens):
-                leading = ''
-                trailing = ''
-                core = tok
-                while core and not re.match(r'[\u0900-\u097F]', core[0]):
-                    leading += core[0]
-                    core = core[1:]
-                while core and not re.match(r'[\u0900-\u097F]', core[-1]):
-                    trailing = core[-1] + trailing
-                    core = core[:-1]
-                if not core:
-                    continue
-                word = core
-                if word in freq_dict:
-                    continue
-
-                cands = generate_candidates(word, freq_dict)
-                if use_semantic:
-                    model = try_load_embeddings(embed_path) if embed_path else try_load_embeddings('embeddings.model')
-                    cands = rerank_candidates(word, cands, model=model, weight_semantic=float(sem_weight))
-
-                display = []
-                for cand, dist, freq in cands[:5]:
-                    op = operation_type(word, cand) if dist == 1 else None
-                    if op:
-                        display.append(f"{cand} (dist={dist}, op={op}, freq={freq})")
-                    else:
-                        display.append(f"{cand} (dist={dist}, freq={freq})")
-
-                best = cands[0] if cands else None
-                best_word = best[0] if best else None
-                best_dist = best[1] if best else None
-                best_freq = best[2] if best else 0
-
-                misspelled[word] = display
-
-                apply_correction = False
-                if best:
-                    if best_dist == 1:
-                        apply_correction = True
-                    elif best_dist == 2 and best_freq >= 200:
-                        apply_correction = True
-
-                if apply_correction and best_word:
-                    corrected_tokens[idx_tok] = leading + best_word + trailing
-                else:
-                    corrected_tokens[idx_tok] = leading + word + trailing
-
-            corrected_sentence = ''.join(corrected_tokens)
-
-            m = re.search(r'([^\u0900-\u097F\s])\s*$', line)
-            if m:
-                end_punct = m.group(1)
-                if not corrected_sentence.endswith(end_punct):
-                    corrected_sentence = corrected_sentence + end_punct
-
-            corrected_sentence = ''.join(corrected_tokens)
-
-            results.append({
-                'line_number': i,
-                'original': line,
-                'corrected': corrected_sentence,
-                'misspelled': misspelled,
-            })
-
-        write_output_file(results, output_file)
+        with streaming.open_input(input_file) as f:
+            first = f.readline()
+            if not first:
+                print(f"Error: {input_file} is empty")
+                return
+
+            print(f"Processing lines from: {input_file}...")
+
+            lines = _chain_first(first, f)
+            results = engine.check_lines(lines) if manifest is None else check_lines_incremental(engine, lines, manifest)
+            processed = 0
+            with streaming.open_output(output_file) as out:
+                write_output_header(out)
+                for result in results:
+                    print(f"Processing line {result['line_number']}: {result['original'][:50]}...")
+                    with metrics.timer('format'):
+                        out.write(format_result(result))
+                    processed += 1
+                    if processed % streaming.FLUSH_EVERY == 0:
+                        out.flush()
 
         print("\nProcessing complete!")
         print(f"Results written to: {output_file}")
-        print(f"Total lines processed: {len(results)}")
+        print(f"Total lines processed: {processed}")
+        print(engine.cache.summary())
+        if engine.budget_summary():
+            print(engine.budget_summary())
+        if manifest is not None:
+            manifest.save()
+            print(manifest.summary())
 
     except FileNotFoundError:
         print(f"Error: {input_file} not found")
@@ -126,30 +120,101 @@ def process_input_file(input_file='input.txt', output_file='output.txt', use_sem
         print(f"Processing error: {e}")
 
 
+def _stamp(path):
+    try:
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+    except OSError:
+        return None
+
+
+def watch_input(engine, input_file, output_file, interval=1.0, output_format='text', print=print):
+    """Re-check ``input_file`` incrementally whenever its size or mtime changes, until Ctrl-C."""
+    print(f"Watching {input_file} every {interval:g}s (Ctrl-C to stop)")
+    seen = None
+    try:
+        while True:
+            stamp = _stamp(input_file)
+            if stamp is not None and stamp != seen:
+                seen = stamp
+                check_file(engine, input_file, output_file, output_format, print, incremental=True)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+
+def _chain_first(first, f):
+    yield first
+    yield from f
+
+
+def write_output_header(f):
+    f.write("HINDI SPELL CHECKER - OUTPUT RESULTS\n")
+    f.write("=" * 60 + "\n\n")
+
+
+def format_result(res):
+    parts = [
+        f"Line {res['line_number']}:\n",
+        "-" * 40 + "\n",
+        f"Original:  {res['original']}\n",
+        f"Corrected: {res['corrected']}\n",
+    ]
+    if res['misspelled']:
+        parts.append(f"\nMisspelled Words ({len(res['misspelled'])}):\n")
+        for w, s in res['misspelled'].items():
+            parts.append(f"  '{w}' -> {', '.join(s)}\n")
+    else:
+        parts.append("\nNo misspelled words found.\n")
+    parts.append("\n" + "=" * 60 + "\n\n")
+    return ''.join(parts)
+
+
 def write_output_file(results, output_file):
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write("HINDI SPELL CHECKER - OUTPUT RESULTS\n")
-        f.write("=" * 60 + "\n\n")
+    with streaming.open_output(output_file) as f:
+        write_output_header(f)
         for res in results:
-            f.write(f"Line {res['line_number']}:\n")
-            f.write("-" * 40 + "\n")
-            f.write(f"Original:  {res['original']}\n")
-            f.write(f"Corrected: {res['corrected']}\n")
-            if res['misspelled']:
-                f.write(f"\nMisspelled Words ({len(res['misspelled'])}):\n")
-                for w, s in res['misspelled'].items():
-                    f.write(f"  '{w}' -> {', '.join(s)}\n")
-            else:
-                f.write("\nNo misspelled words found.\n")
-            f.write("\n" + "=" * 60 + "\n\n")
+            f.write(format_result(res))
 
 
 if __name__ == '__main__':
-    import sys
-    input_file = 'input.txt'
-    output_file = 'output.txt'
-    if len(sys.argv) > 1:
-        input_file = sys.argv[1]
-    if len(sys.argv) > 2:
-        output_file = sys.argv[2]
-    process_input_file(input_file, output_file)
+    import argparse
+    parser = argparse.ArgumentParser(description="File-based Hindi spell checker using index.pkl")
+    parser.add_argument('input_file', nargs='?', default='input.txt', help="Input file; '-' for stdin")
+    parser.add_argument('output_file', nargs='?', default='output.txt', help="Output file; '-' for stdout")
+    parser.add_argument('--index', default='index.pkl', help='Dictionary built by data_loader.py')
+    parser.add_argument('--fallback', choices=FALLBACK_KINDS, default='scan', help='Index used when no candidate is within distance 2')
+    parser.add_argument('--no-deletes', action='store_true', help='Generate edits1/edits2 strings instead of using the persisted deletion index')
+    parser.add_argument('--edits', choices=EDIT_MODES, default='codepoint', help='Edit generator used with --no-deletes')
+    parser.add_argument('--trie', action='store_true', help='Find candidates with one DAWG traversal instead of the deletes/fallback cascade')
+    parser.add_argument('--phonetic', action='store_true', help='Look up sound-alike spellings (phonetic key) before generating edits')
+    parser.add_argument('--mmap', action='store_true', help='Open the dictionary as a shared read-only memory map (<base>.dict.bin) instead of loading it')
+    parser.add_argument('--context', action='store_true',
+                        help='Reorder candidates by title bigram counts with the neighbouring words (data_loader.py --bigrams)')
+    parser.add_argument('--context-weight', type=float, default=1.0,
+                        help='Edits of distance that ten bigram sightings are worth with --context')
+    parser.add_argument('--word-budget-ms', type=float, default=None,
+                        help='Stop the candidate search of one word after this long and keep the best found so far')
+    parser.add_argument('--line-budget-ms', type=float, default=None,
+                        help='Time budget shared by the unknown words of one line (with --workers 1)')
+    parser.add_argument('--long-word', type=int, default=None, metavar='N',
+                        help='Words longer than N characters skip edits2 and the full-vocabulary scan')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Re-check only lines changed since the last run (manifest kept as <output>.manifest.json)')
+    parser.add_argument('--watch', type=float, nargs='?', const=1.0, default=None, metavar='SECONDS',
+                        help='Keep checking incrementally whenever the input file changes (polled every SECONDS, default 1)')
+    parser.add_argument('--maxdist', type=int, default=4, help='Maximum edit distance to consider when scanning vocabulary')
+    parser.add_argument('--cache-db', default=None, help='sqlite file that keeps corrections across runs')
+    parser.add_argument('--workers', type=int, default=1, help='Processes used for candidate generation')
+    parser.add_argument('--format', choices=streaming.OUTPUT_FORMATS, default='text',
+                        help='text report, or one JSON line / msgpack record per line with misspelled words')
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    with metrics.session(args):
+        process_input_file(args.input_file, args.output_file, index_file=args.index, use_deletes=not args.no_deletes,
+                           fallback=args.fallback, edits=args.edits, use_trie=args.trie, max_distance=args.maxdist,
+                           cache_db=args.cache_db, workers=args.workers, output_format=args.format,
+                           use_phonetic=args.phonetic, use_mmap=args.mmap, use_context=args.context,
+                           context_weight=args.context_weight, word_budget_ms=args.word_budget_ms,
+                           line_budget_ms=args.line_budget_ms, long_word=args.long_word,
+                           incremental=args.incremental, watch=args.watch)
@@ -0,0 +1,105 @@
+"""
+Incremental re-checking of an edited input (``--incremental`` / ``--watch``)
+
+A ``check_line`` result depends only on the text of the line and on the
+engine: its dictionary version and ranking settings (``SpellEngine.namespace``)
+plus context ranking, which is applied per line. A sidecar manifest
+next to the report, ``<output>.manifest.json``, maps a hash of every checked
+line to its result under a key made of those. A later run re-checks only the
+lines whose hash is not in the manifest. The other lines get their stored
+result with the new line number, so inserting or moving lines costs nothing
+for the lines that did not change.
+
+The manifest is rewritten after each run and holds only the lines of the
+current input. Results cut short by a time budget are never stored.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Iterable
+
+import derived_cache
+import parallel
+from bigram_store import KIND as BIGRAMS
+from correction_cache import cache_namespace
+
+
+def manifest_path(output_file: str) -> str:
+    return output_file + '.manifest.json'
+
+
+def line_key(line: str) -> str:
+    return hashlib.sha1(line.encode('utf-8')).hexdigest()[:16]
+
+
+def results_key(engine) -> str:
+    """What a stored result is valid for: the engine's namespace and its bigram store."""
+    bigrams = None
+    if engine.bigrams is not None:
+        bigrams = derived_cache.source_stamp(derived_cache.derived_path(engine.source_path, BIGRAMS))
+        bigrams = [list(bigrams), engine.context_weight]
+    return cache_namespace(None, namespace=engine.namespace, bigrams=bigrams)
+
+
+class Manifest:
+
+    def __init__(self, path: str, key: str):
+        self.path = path
+        self.key = key
+        self.old: Dict[str, dict] = {}
+        self.new: Dict[str, dict] = {}
+        self.reused = 0
+        self.checked = 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('key') == key:
+                self.old = data['lines']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def lookup(self, line: str):
+        """The stored result for ``line``: from the last run, or from an earlier copy in this one."""
+        key = line_key(line)
+        return self.new.get(key) or self.old.get(key)
+
+    def reuse(self, line_number: int, line: str) -> dict:
+        entry = self.lookup(line)
+        self.new[line_key(line)] = entry
+        self.reused += 1
+        return {'line_number': line_number, 'original': line,
+                'corrected': entry['corrected'], 'misspelled': entry['misspelled']}
+
+    def store(self, result: dict, truncated=()):
+        self.checked += 1
+        if any(w in truncated for w in result['misspelled']):
+            return
+        self.new[line_key(result['original'])] = {'corrected': result['corrected'], 'misspelled': result['misspelled']}
+
+    def save(self):
+        """Write the results of this run's lines; replaced atomically."""
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'key': self.key, 'lines': self.new}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def summary(self) -> str:
+        return f"Incremental: {self.checked} lines checked, {self.reused} reused from {os.path.basename(self.path)}"
+
+
+def check_lines(engine, lines: Iterable[str], manifest: Manifest, start: int = 1):
+    """``engine.check_lines`` that takes unchanged lines from ``manifest`` and records the rest in it."""
+    numbered = ((i, line.strip()) for i, line in enumerate(lines, start))
+    numbered = ((i, line) for i, line in numbered if line)
+    size = parallel.CHUNK_LINES if engine.workers > 1 else 1
+    for chunk in parallel.chunks(numbered, size):
+        todo = [(i, line) for i, line in chunk if manifest.lookup(line) is None]
+        fresh = {r['line_number']: r for r in engine.check_numbered(todo)} if todo else {}
+        for i, line in chunk:
+            result = fresh.get(i)
+            if result is None:
+                result = manifest.reuse(i, line)
+            else:
+                manifest.store(result, engine.truncated)
+            yield result
@@ -1,21 +1,28 @@
-from data_loader import load_index
 import os
 
+from engine import SpellEngine
+
 def main():
-    freq_dict = load_index()
-    if not freq_dict:
+    # the engine is loaded once here and handed to file_processor, so the
+    # dictionary is not unpickled a second time
+    try:
+        engine = SpellEngine.from_index()
+    except FileNotFoundError:
         print("Index not found. Run data_loader.py first.")
         return
     
     print("=" * 60)
     print("Hindi Spell Checker")
     print("=" * 60)
-    print(f"Dictionary loaded with {len(freq_dict)} words")
+    print(f"Dictionary loaded with {len(engine.word_freq)} words")
     print("\nProcessing input.txt file -> output.txt")
     
-    process_file_option()
+    try:
+        process_file_option(engine)
+    finally:
+        engine.close()
 
-def process_file_option():
+def process_file_option(engine=None):
     input_file = "input.txt"
     output_file = "output.txt"
     
@@ -27,7 +34,7 @@ def process_file_option():
     
     try:
         from file_processor import process_input_file
-        process_input_file(input_file, output_file)
+        process_input_file(input_file, output_file, engine=engine)
     except ImportError:
         print("Error: file_processor.py not found!")
     except Exception as e:
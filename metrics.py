@@ -0,0 +1,190 @@
+"""
+Per-stage counters and timers for the correction pipeline
+
+Everything is off by default: ``count`` returns at once and ``timer`` hands
+back a shared no-op context manager, so an instrumented call site costs one
+global lookup and a function call. ``enable()`` (or ``--stats`` on the
+runners) switches recording on.
+
+Stages timed across the runners: ``tokenize``, ``candidates.near`` (deletion
+index / edits / DAWG), ``candidates.fallback`` (vocabulary index or full
+scan), ``candidates.rank``, ``semantic.rerank``, ``format`` and
+``corpus.load``. The ``tier.*`` counters record which step of the cascade
+resolved each unknown word. Lines slower than ``slow_ms`` are reported on
+stderr as soon as they finish, and the slowest ones are kept for the summary.
+
+With ``--workers N`` the candidate stages run in the worker processes and
+are not included in the parent's totals.
+"""
+
+import heapq
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+ENABLED = False
+SLOWEST_KEPT = 10
+
+_counters = {}
+_timers = {}  # name -> [calls, seconds]
+_slowest = []  # min-heap of (seconds, line)
+_slow_ms = None
+
+
+class _Timer:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        add_time(self.name, time.perf_counter() - self.start)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+
+_NULL = _NullTimer()
+
+
+def enable(slow_ms=None):
+    global ENABLED, _slow_ms
+    ENABLED = True
+    _slow_ms = slow_ms
+
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+
+def reset():
+    _counters.clear()
+    _timers.clear()
+    del _slowest[:]
+
+
+def count(name, n=1):
+    if ENABLED:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def add_time(name, seconds):
+    if ENABLED:
+        t = _timers.get(name)
+        if t is None:
+            _timers[name] = [1, seconds]
+        else:
+            t[0] += 1
+            t[1] += seconds
+
+
+def timer(name):
+    """``with metrics.timer('stage'):`` adds the block's wall time to ``stage`` when enabled."""
+    return _Timer(name) if ENABLED else _NULL
+
+
+def line_done(line, seconds):
+    """Record one finished input line; warns right away if it was slower than ``slow_ms``."""
+    if not ENABLED:
+        return
+    add_time('line', seconds)
+    if len(_slowest) < SLOWEST_KEPT:
+        heapq.heappush(_slowest, (seconds, line))
+    elif seconds > _slowest[0][0]:
+        heapq.heapreplace(_slowest, (seconds, line))
+    if _slow_ms is not None and seconds * 1000.0 >= _slow_ms:
+        print(f"slow line {line}: {seconds * 1000.0:.1f} ms", file=sys.stderr, flush=True)
+
+
+def summary():
+    return {
+        'counters': dict(sorted(_counters.items())),
+        'timers': {name: {'calls': calls, 'seconds': round(sec, 6)} for name, (calls, sec) in sorted(_timers.items())},
+        'slowest_lines': [{'line': line, 'ms': round(sec * 1000.0, 3)} for sec, line in sorted(_slowest, reverse=True)],
+    }
+
+
+def format_summary():
+    s = summary()
+    out = ["Pipeline stats", "-" * 40]
+    for name, t in s['timers'].items():
+        per = t['seconds'] / t['calls'] * 1000.0 if t['calls'] else 0.0
+        out.append(f"  {name:<22} {t['seconds']:10.3f} s  {t['calls']:8d} calls  {per:9.3f} ms/call")
+    for name, n in s['counters'].items():
+        out.append(f"  {name:<22} {n:10d}")
+    if s['slowest_lines']:
+        out.append("  slowest lines: " + ', '.join(f"{x['line']} ({x['ms']:.1f} ms)" for x in s['slowest_lines']))
+    return '\n'.join(out)
+
+
+@contextmanager
+def profile(kind=None, out_path=None):
+    """Wrap a run in cProfile or tracemalloc; the report goes to ``out_path`` or stderr."""
+    if kind == 'cprofile':
+        import cProfile
+        import pstats
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            yield
+        finally:
+            prof.disable()
+            if out_path:
+                prof.dump_stats(out_path)
+            else:
+                pstats.Stats(prof, stream=sys.stderr).sort_stats('cumulative').print_stats(25)
+    elif kind == 'tracemalloc':
+        import tracemalloc
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            lines = [f"tracemalloc: current {current / 1e6:.1f} MB, peak {peak / 1e6:.1f} MB"]
+            lines += [str(stat) for stat in snapshot.statistics('lineno')[:25]]
+            if out_path:
+                with open(out_path, 'w', encoding='utf-8') as f:
+                    f.write('\n'.join(lines) + '\n')
+            else:
+                print('\n'.join(lines), file=sys.stderr)
+    else:
+        yield
+
+
+def add_arguments(parser):
+    parser.add_argument('--stats', action='store_true', help='Print per-stage timers and counters to stderr at the end')
+    parser.add_argument('--stats-json', default=None, help='Also write the stats as JSON to this file')
+    parser.add_argument('--slow-ms', type=float, default=None, help='Report lines slower than this as they finish')
+    parser.add_argument('--profile', choices=('cprofile', 'tracemalloc'), default=None, help='Wrap the run in a profiler')
+    parser.add_argument('--profile-out', default=None, help='Profiler output file (default: report on stderr)')
+
+
+@contextmanager
+def session(args):
+    """Enable recording and profiling as requested by the ``add_arguments`` flags."""
+    if args.stats or args.stats_json or args.slow_ms is not None:
+        enable(slow_ms=args.slow_ms)
+    try:
+        with profile(args.profile, args.profile_out):
+            yield
+    finally:
+        if args.stats:
+            print(format_summary(), file=sys.stderr)
+        if args.stats_json:
+            with open(args.stats_json, 'w', encoding='utf-8') as f:
+                json.dump(summary(), f, indent=2)
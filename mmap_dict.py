@@ -0,0 +1,190 @@
+"""
+Read-only word-frequency dictionary opened with mmap
+
+``index.pkl`` and the corpus JSON cache have to be turned into a Counter in
+every process that uses them. This format is opened instead: the file is
+mapped read-only and membership / frequency lookups read the mapped pages
+directly, so opening takes milliseconds and any number of processes on one
+host share one copy of it in the page cache.
+
+Layout (little-endian), next to the source as ``<base>.dict.bin``::
+
+    header   magic, version, word count n, table size t, blob length,
+             source size and mtime (stale files are rebuilt)
+    offsets  uint32[n + 1]  byte offset of each word in the blob
+    freqs    uint32[n]      frequency of each word (clamped to 2**32 - 1)
+    table    uint32[t]      open-addressing hash table (crc32, linear
+                            probing) of word number + 1; 0 is an empty slot
+    blob     the UTF-8 words back to back
+
+Words are kept in the source dictionary's iteration order, so iterating an
+``MmapDict`` visits them exactly as iterating the Counter would.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from zlib import crc32
+
+import derived_cache
+
+MAGIC = b'HSPDICT\x00'
+VERSION = 1
+_HEADER = struct.Struct('<8sIIIQQq')
+_MAX_FREQ = 0xFFFFFFFF
+
+
+def path_for(source_path: str) -> str:
+    return os.path.splitext(source_path)[0] + '.dict.bin'
+
+
+def _u32(values) -> bytes:
+    arr = array('I', values)
+    if sys.byteorder == 'big':
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def write(path: str, word_freq, source_path: str = None):
+    """Write ``word_freq`` to ``path``; replaced atomically, so open readers keep their old mapping."""
+    words = [w.encode('utf-8') for w in word_freq]
+    freqs = [min(int(word_freq[w]), _MAX_FREQ) for w in word_freq]
+    offsets = [0]
+    for w in words:
+        offsets.append(offsets[-1] + len(w))
+    blob = b''.join(words)
+    if len(blob) > _MAX_FREQ:
+        raise ValueError("dictionary too large for 32-bit offsets")
+    size = 2
+    while size < 2 * len(words):
+        size *= 2
+    mask = size - 1
+    table = [0] * size
+    for i, w in enumerate(words):
+        slot = crc32(w) & mask
+        while table[slot]:
+            slot = (slot + 1) & mask
+        table[slot] = i + 1
+    src_size, src_mtime = derived_cache.source_stamp(source_path) if source_path else (0, 0)
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(words), size, len(blob), src_size, src_mtime))
+        f.write(_u32(offsets))
+        f.write(_u32(freqs))
+        f.write(_u32(table))
+        f.write(blob)
+    os.replace(tmp, path)
+
+
+class MmapDict(Mapping):
+    """Mapping of word -> frequency over a file written by ``write``."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n, size, blob_len, src_size, src_mtime = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} is not a dictionary file of version {VERSION}")
+        self.source = (src_size, src_mtime)
+        self._n = n
+        self._mask = size - 1
+        self._view = view = memoryview(self._mm)
+        pos = _HEADER.size
+        self._offsets = self._u32_view(view, pos, n + 1)
+        pos += 4 * (n + 1)
+        self._freqs = self._u32_view(view, pos, n)
+        pos += 4 * n
+        self._table = self._u32_view(view, pos, size)
+        pos += 4 * size
+        self._blob = view[pos:pos + blob_len]
+
+    @staticmethod
+    def _u32_view(view, pos, count):
+        part = view[pos:pos + 4 * count]
+        if sys.byteorder == 'little':
+            return part.cast('I')
+        # big-endian hosts get a private, byte-swapped copy
+        arr = array('I', part.tobytes())
+        arr.byteswap()
+        return arr
+
+    def _find(self, word) -> int:
+        if not isinstance(word, str):
+            return -1
+        try:
+            key = word.encode('utf-8')
+        except UnicodeEncodeError:
+            return -1
+        table, offsets, blob, mask = self._table, self._offsets, self._blob, self._mask
+        slot = crc32(key) & mask
+        while True:
+            i = table[slot]
+            if not i:
+                return -1
+            i -= 1
+            if blob[offsets[i]:offsets[i + 1]] == key:
+                return i
+            slot = (slot + 1) & mask
+
+    def _word(self, i: int) -> str:
+        return str(self._blob[self._offsets[i]:self._offsets[i + 1]], 'utf-8')
+
+    def __contains__(self, word) -> bool:
+        return self._find(word) >= 0
+
+    def __getitem__(self, word) -> int:
+        i = self._find(word)
+        if i < 0:
+            raise KeyError(word)
+        return self._freqs[i]
+
+    def get(self, word, default=None):
+        i = self._find(word)
+        return self._freqs[i] if i >= 0 else default
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __iter__(self):
+        for i in range(self._n):
+            yield self._word(i)
+
+    def items(self):
+        freqs = self._freqs
+        return ((self._word(i), freqs[i]) for i in range(self._n))
+
+    def close(self):
+        for name in ('_offsets', '_freqs', '_table', '_blob', '_view'):
+            part = getattr(self, name)
+            if isinstance(part, memoryview):
+                part.release()
+        self._mm.close()
+
+
+def open_dict(path: str, source_path: str = None):
+    """The ``MmapDict`` at ``path``, or None if it is missing, unreadable or older than ``source_path``."""
+    if not os.path.exists(path):
+        return None
+    try:
+        d = MmapDict(path)
+    except (OSError, ValueError, struct.error):
+        return None
+    if source_path and d.source != tuple(derived_cache.source_stamp(source_path)):
+        d.close()
+        return None
+    return d
+
+
+def load_or_build(source_path: str, load) -> MmapDict:
+    """Open the mapped dictionary of ``source_path``, writing it from ``load()`` first if it is missing or stale."""
+    path = path_for(source_path)
+    d = open_dict(path, source_path)
+    if d is None:
+        write(path, load(), source_path)
+        d = MmapDict(path)
+    return d
@@ -0,0 +1,175 @@
+"""
+Character trigram inverted index over the vocabulary
+
+Each word is stored under every distinct trigram it contains (words shorter
+than three characters under the word itself, as in
+``semantic_rank.char_ngram_similarity``), together with its length and its
+number of distinct trigrams. A query walks the posting lists of its own
+trigrams once, which gives the number of trigrams shared with every word in
+the vocabulary:
+
+- ``search`` (``--fallback ngram``) runs the exact distance only on words that
+  share enough trigrams, instead of on the whole vocabulary;
+- ``jaccards`` turns the same counts into the trigram Jaccard similarity used by
+  ``rerank_candidates`` without rebuilding any sets.
+
+The count filter follows the q-gram lemma: an OSA edit touches at most n+1
+trigram positions, so a word within distance k of the query shares at least
+``max(|A|, |B|) - k*(n+1)`` distinct trigrams with it. For short words and
+large k that bound drops to zero, and a word within distance k may share no
+trigram at all with the query. The words are also grouped by length and number
+of trigrams, and the groups whose bound is zero or less are checked with the
+exact distance word by word, so ``search`` finds the same words as the full
+scan.
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+import derived_cache
+from semantic_rank import _char_ngrams
+from spell_checker import DeadlineExceeded, expired, levenshtein_distance
+
+N = 3
+
+
+class NgramIndex:
+
+    def __init__(self, word_freq: Iterable[str] = (), n: int = N):
+        self.n = n
+        self.words: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.lengths: List[int] = []
+        self.sizes: List[int] = []
+        # word ids by (length, number of distinct trigrams)
+        self.buckets: Dict[Tuple[int, int], List[int]] = {}
+        self.postings: Dict[str, List[int]] = {}
+        self.add(word_freq)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, words: Iterable[str]):
+        for w in words:
+            if w in self.ids:
+                continue
+            i = len(self.words)
+            self.ids[w] = i
+            self.words.append(w)
+            self.lengths.append(len(w))
+            grams = _char_ngrams(w, self.n)
+            self.sizes.append(len(grams))
+            self.buckets.setdefault((len(w), len(grams)), []).append(i)
+            for g in grams:
+                bucket = self.postings.get(g)
+                if bucket is None:
+                    self.postings[g] = [i]
+                else:
+                    bucket.append(i)
+        self._last = (None, None, 0)
+
+    def remove(self, words: Iterable[str]):
+        """Drop words from the posting lists; their ids are not reused."""
+        for w in words:
+            i = self.ids.pop(w, None)
+            if i is None:
+                continue
+            key = (self.lengths[i], self.sizes[i])
+            self.buckets[key].remove(i)
+            if not self.buckets[key]:
+                del self.buckets[key]
+            for g in _char_ngrams(w, self.n):
+                bucket = self.postings.get(g)
+                if bucket is not None:
+                    bucket.remove(i)
+                    if not bucket:
+                        del self.postings[g]
+        self._last = (None, None, 0)
+
+    def shared_counts(self, word: str) -> Tuple[Dict[int, int], int]:
+        """``({word id: shared trigram count}, number of trigrams in word)``; the last query is kept."""
+        # one read of the memo: the server calls this from several threads, and another
+        # query may replace the tuple between the word check and the counts read
+        last = self._last
+        if last[0] == word:
+            return last[1], last[2]
+        grams = _char_ngrams(word, self.n)
+        counts: Dict[int, int] = {}
+        get = counts.get
+        for g in grams:
+            for i in self.postings.get(g, ()):
+                counts[i] = get(i, 0) + 1
+        self._last = (word, counts, len(grams))
+        return counts, len(grams)
+
+    def min_shared(self, query_size: int, word_size: int, max_distance: int) -> int:
+        return max(1, max(query_size, word_size) - max_distance * (self.n + 1))
+
+    def search(self, word: str, max_distance: int, deadline=None) -> List[Tuple[str, int]]:
+        """``(candidate, levenshtein_distance)`` for every word within ``max_distance``.
+
+        Past ``deadline``, DeadlineExceeded carries the words found so far.
+        """
+        counts, q = self.shared_counts(word)
+        m = len(word)
+        found = []
+        # words with at most this many trigrams need not share any with the query
+        free = max_distance * (self.n + 1)
+        if q <= free:
+            checked = 0
+            for length in range(max(0, m - max_distance), m + max_distance + 1):
+                for size in range(1, free + 1):
+                    for i in self.buckets.get((length, size), ()):
+                        checked += 1
+                        if not checked % 16 and expired(deadline):
+                            raise DeadlineExceeded(found)
+                        cand = self.words[i]
+                        d = levenshtein_distance(word, cand, max_distance)
+                        if d <= max_distance:
+                            found.append((cand, d))
+        for k, (i, shared) in enumerate(counts.items()):
+            if not k % 16 and expired(deadline):
+                raise DeadlineExceeded(found)
+            if abs(self.lengths[i] - m) > max_distance or max(q, self.sizes[i]) <= free:
+                continue
+            if shared < self.min_shared(q, self.sizes[i], max_distance):
+                continue
+            cand = self.words[i]
+            d = levenshtein_distance(word, cand, max_distance)
+            if d <= max_distance:
+                found.append((cand, d))
+        return found
+
+    def jaccards(self, word: str, candidates: Iterable[str]) -> List[float]:
+        """Trigram Jaccard similarity of ``word`` with each candidate, read from the posting counts."""
+        counts, q = self.shared_counts(word)
+        out = []
+        for c in candidates:
+            i = self.ids.get(c)
+            if i is None:
+                grams = _char_ngrams(c, self.n)
+                inter = len(grams & _char_ngrams(word, self.n))
+                size = len(grams)
+            else:
+                inter = counts.get(i, 0)
+                size = self.sizes[i]
+            out.append(inter / (q + size - inter))
+        return out
+
+
+def patch(word_freq, source_path: str, old_stamp, old_vocab_size: int, added: Iterable[str], removed: Iterable[str],
+          n: int = N) -> bool:
+    """Update the persisted index for a changed dictionary; False if there is none to update."""
+    path = derived_cache.derived_path(source_path, 'ngrams')
+    index = derived_cache.load(path, stamp=old_stamp, n=n, vocab_size=old_vocab_size, buckets=True)
+    if index is None:
+        return False
+    index.remove(removed)
+    index.add(added)
+    derived_cache.save(path, index, source_path=source_path, n=n, vocab_size=len(word_freq), buckets=True)
+    return True
+
+
+def load_or_build(word_freq, source_path: str, n: int = N) -> NgramIndex:
+    """Load the index persisted next to ``source_path``, rebuilding it if stale."""
+    return derived_cache.load_or_build('ngrams', source_path, lambda: NgramIndex(word_freq, n=n),
+                                       n=n, vocab_size=len(word_freq), buckets=True)
@@ -0,0 +1,91 @@
+"""
+Multi-core candidate generation for the file runners (``--workers N``)
+
+The input is taken in chunks of lines. For each chunk the distinct unknown
+words are collected, corrected once each in a pool of worker processes, and
+the chunk is then formatted in the parent in the original line order.
+
+Workers are forked after the dictionary and its indexes are loaded, so they
+read the parent's copies through copy-on-write pages instead of receiving a
+pickled dictionary; only words go out and suggestions come back. On platforms
+without ``fork`` the words are corrected in-process.
+"""
+
+import gc
+import re
+from itertools import islice
+from typing import Callable, Dict, Iterable, List
+
+CHUNK_LINES = 2000
+BATCH_WORDS = 64
+
+_WORD_RE = re.compile(r'[\u0900-\u097F]+')
+
+# suggest(word) of the pool being created; inherited by forked workers
+_suggest = None
+
+
+def _run(words):
+    return [(w, _suggest(w)) for w in words]
+
+
+def chunks(items: Iterable, size: int = CHUNK_LINES):
+    """Yield lists of up to ``size`` consecutive items."""
+    it = iter(items)
+    while True:
+        block = list(islice(it, size))
+        if not block:
+            return
+        yield block
+
+
+def unknown_words(lines: Iterable[str], is_known: Callable[[str], bool]) -> List[str]:
+    """Distinct Devanagari words of ``lines`` rejected by ``is_known``, in first-seen order."""
+    seen = {}
+    for line in lines:
+        for w in _WORD_RE.findall(line):
+            if w not in seen and not is_known(w):
+                seen[w] = None
+    return list(seen)
+
+
+class SuggestPool:
+    """Runs ``suggest(word)`` in ``workers`` forked processes sharing the parent's memory."""
+
+    def __init__(self, suggest: Callable, workers: int):
+        global _suggest
+        self.suggest = suggest
+        self.workers = workers
+        self.pool = None
+        if workers <= 1:
+            return
+        import multiprocessing
+        if 'fork' in multiprocessing.get_all_start_methods():
+            _suggest = suggest
+            # keep the collector from touching (and so copying) the inherited objects
+            gc.freeze()
+            self.pool = multiprocessing.get_context('fork').Pool(workers)
+
+    def map(self, words: List[str]) -> Dict[str, object]:
+        """``{word: suggest(word)}`` for every word."""
+        if self.pool is None or len(words) < 2:
+            return {w: self.suggest(w) for w in words}
+        size = max(1, min(BATCH_WORDS, len(words) // (self.workers * 4)))
+        batches = [words[i:i + size] for i in range(0, len(words), size)]
+        out = {}
+        for part in self.pool.imap_unordered(_run, batches):
+            out.update(part)
+        return out
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+            gc.unfreeze()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,99 @@
+"""
+Phonetic-key candidate index for sound-alike misspellings
+
+``phonetic_key`` folds the spellings Hindi writers most often confuse onto one
+form: short/long i and u (matras and independent vowels), chandrabindu and
+half-nasal consonants before a consonant onto anusvara, श/ष onto स, and nukta
+letters onto their base consonant. Such confusions are often two or more
+edits apart, so the edit cascade only reaches them through edits2 or the
+full-vocabulary scan.
+
+Every Devanagari dictionary word is stored under its key. With ``--phonetic``,
+``generate_candidates`` first looks up the query's key. If that yields words
+within ``max_distance`` they are the candidates, ranked by the usual
+distance/frequency rules, and no edits are generated. Otherwise the normal
+cascade runs.
+"""
+
+import re
+from typing import Dict, Iterable, List
+
+import derived_cache
+from akshara import NUKTA, is_devanagari
+from spell_checker import levenshtein_distance
+
+_FOLD = str.maketrans({
+    'ी': 'ि', 'ू': 'ु', 'ई': 'इ', 'ऊ': 'उ',
+    'ँ': 'ं',
+    'श': 'स', 'ष': 'स',
+    '\u0958': 'क', '\u0959': 'ख', '\u095A': 'ग', '\u095B': 'ज', '\u095C': 'ड', '\u095D': 'ढ', '\u095E': 'फ', '\u095F': 'य',
+    NUKTA: None,
+})
+# a nasal consonant with virama before another consonant is written as anusvara just as often
+_HALF_NASAL_RE = re.compile('[ङञणनम]्(?=[क-ह])')
+
+
+def phonetic_key(word: str) -> str:
+    return _HALF_NASAL_RE.sub('ं', word.translate(_FOLD))
+
+
+class PhoneticIndex:
+
+    def __init__(self, table: Dict[str, List[str]] = None):
+        self.table = table if table is not None else {}
+
+    @classmethod
+    def build(cls, words: Iterable[str]) -> 'PhoneticIndex':
+        index = cls()
+        index.add(words)
+        return index
+
+    def add(self, words: Iterable[str]):
+        for w in words:
+            if not is_devanagari(w):
+                continue
+            bucket = self.table.setdefault(phonetic_key(w), [])
+            if w not in bucket:
+                bucket.append(w)
+
+    def remove(self, words: Iterable[str]):
+        for w in words:
+            key = phonetic_key(w)
+            bucket = self.table.get(key)
+            if bucket and w in bucket:
+                bucket.remove(w)
+                if not bucket:
+                    del self.table[key]
+
+    def lookup(self, word: str) -> List[str]:
+        """Dictionary words with the same phonetic key as ``word``."""
+        return self.table.get(phonetic_key(word), [])
+
+    def within(self, word: str, max_distance: int) -> Dict[str, int]:
+        """``{candidate: levenshtein_distance}`` for the sound-alikes of ``word`` within ``max_distance``."""
+        found = {}
+        for cand in self.lookup(word):
+            if cand == word:
+                continue
+            d = levenshtein_distance(word, cand, max_distance)
+            if d <= max_distance:
+                found[cand] = d
+        return found
+
+
+def patch(word_freq, source_path: str, old_stamp, old_vocab_size: int, added: Iterable[str], removed: Iterable[str]) -> bool:
+    """Update the persisted index for a changed dictionary; False if there is none to update."""
+    path = derived_cache.derived_path(source_path, 'phonetic')
+    index = derived_cache.load(path, stamp=old_stamp, vocab_size=old_vocab_size)
+    if index is None:
+        return False
+    index.remove(removed)
+    index.add(added)
+    derived_cache.save(path, index, source_path=source_path, vocab_size=len(word_freq))
+    return True
+
+
+def load_or_build(word_freq, source_path: str) -> PhoneticIndex:
+    """Load the index persisted next to ``source_path``, rebuilding it if stale."""
+    return derived_cache.load_or_build('phonetic', source_path, lambda: PhoneticIndex.build(word_freq),
+                                       vocab_size=len(word_freq))
@@ -1,79 +1,44 @@
 import argparse
 import os
-import re
 
-from corpus_dict import CorpusDict
+from engine import SpellEngine
+import metrics
 import spell_checker as sc
-
-
-def check_file_with_dict(input_path, output_path, corpus_path, cache_path=None, top_n=5, max_distance=4):
-    print("Corpus loaded...")
-    corpus = CorpusDict(corpus_path, cache_path=cache_path)
-
-    with open(input_path, 'r', encoding='utf-8') as f:
-        lines = [ln.rstrip('\n') for ln in f.readlines()]
-
-    results = []
-
-    for idx, sentence in enumerate(lines, start=1):
-        tokens = re.findall(r'[\u0900-\u097F]+|[^\u0900-\u097F]+', sentence)
-        corrected = tokens[:]
-        miss_info = []
-        for i, tok in enumerate(tokens):
-            if re.fullmatch(r'[\u0900-\u097F]+', tok):
-                word = tok
-                if corpus.is_known(word):
-                    continue
-                e1 = sc.edits1(word)
-                cand_set = set(w for w in e1 if corpus.is_known(w))
-                if not cand_set:
-                    e2 = set(e2 for e1w in e1 for e2 in sc.edits1(e1w))
-                    cand_set |= set(w for w in e2 if corpus.is_known(w))
-                if not cand_set:
-                    for v in corpus.vocab():
-                        d = sc.levenshtein_distance(word, v)
-                        if d <= max_distance:
-                            cand_set.add(v)
-
-                candidates = []
-                for c in cand_set:
-                    candidates.append((c, sc.levenshtein_distance(word, c)))
-
-                enriched = corpus.top_n_candidates(candidates, n=top_n)
-
-                display = []
-                for c, dist, freq in enriched:
-                    op = sc.operation_type(word, c) if dist == 1 else None
-                    if op:
-                        display.append(f"{c} (dist={dist}, op={op}, freq={freq})")
-                    else:
-                        display.append(f"{c} (dist={dist}, freq={freq})")
-
-                best = enriched[0][0] if enriched else None
-                miss_info.append({'word': word, 'candidates': display, 'best': best})
-                if best:
-                    corrected[i] = best
-
-        if miss_info:
-            results.append(f"Line {idx} corrections:")
-            for info in miss_info:
-                results.append(f"  Word: {info['word']}")
-                results.append(f"  Suggestions: {', '.join(info['candidates'])}")
-                results.append(f"  Best correction: {info['best']}")
-                results.append("")
+import streaming
+
+
+def check_file_with_dict(input_path, output_path, corpus_path, cache_path=None, top_n=5, max_distance=4, use_deletes=True,
+                         fallback='scan', edits='codepoint', use_trie=False, workers=1, engine=None, output_format='text',
+                         use_phonetic=False, use_mmap=False):
+    """Check ``input_path`` against a titles corpus; pass ``engine`` to reuse a loaded ``SpellEngine``."""
+    status = streaming.status_printer(output_path)
+    status("Corpus loaded...")
+    own = engine is None
+    if own:
+        engine = SpellEngine.from_corpus(corpus_path, cache_path=cache_path, top_n=top_n, max_distance=max_distance,
+                                         use_deletes=use_deletes, fallback=fallback, edits=edits, use_trie=use_trie,
+                                         workers=workers, use_phonetic=use_phonetic, use_mmap=use_mmap)
+    try:
+        if output_format != 'text':
+            with streaming.open_input(input_path) as f, streaming.open_records(output_path, output_format) as records:
+                for record in engine.flag_lines(f, apply=bool):
+                    records.write(record)
         else:
-            results.append(f"Line {idx}: No misspelled Hindi words.")
-
-        results.append(f"Original (line {idx}): {sentence}")
-        results.append(f"Corrected (line {idx}): {''.join(corrected)}")
-        results.append('-' * 60)
-        results.append('')
-
-    with open(output_path, 'w', encoding='utf-8') as outf:
-        outf.write("Hindi Spell Checker (dict wrapper) - Detailed Output\n\n")
-        outf.write('\n'.join(results))
-
-    print(f" Completed। output saved to: {output_path}")
+            with streaming.open_input(input_path) as f, streaming.open_output(output_path) as outf:
+                outf.write("Hindi Spell Checker (dict wrapper) - Detailed Output\n\n")
+                writer = streaming.JoinedWriter(outf)
+                numbered = ((idx, ln.rstrip('\n')) for idx, ln in enumerate(f, start=1))
+                for chunk, found in engine.resolve_chunks(numbered):
+                    for idx, sentence in chunk:
+                        result = engine.check_line(idx, sentence, found, apply=bool)
+                        miss_info = sc.misspelled_occurrences(sentence, result['misspelled'], found)
+                        with metrics.timer('format'):
+                            writer.write_lines(sc.format_line_report(idx, sentence, result['corrected'], miss_info))
+    finally:
+        if own:
+            engine.close()
+
+    status(f" Completed। output saved to: {output_path}")
 
 
 if __name__ == '__main__':
@@ -84,6 +49,19 @@ if __name__ == '__main__':
     parser.add_argument('--cache', default=os.path.join('output', 'corpus.json'))
     parser.add_argument('--top', type=int, default=5)
     parser.add_argument('--maxdist', type=int, default=4)
+    parser.add_argument('--no-deletes', action='store_true')
+    parser.add_argument('--edits', choices=sc.EDIT_MODES, default='codepoint')
+    parser.add_argument('--trie', action='store_true')
+    parser.add_argument('--phonetic', action='store_true')
+    parser.add_argument('--mmap', action='store_true')
+    parser.add_argument('--fallback', choices=sc.FALLBACK_KINDS, default='scan')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--format', choices=streaming.OUTPUT_FORMATS, default='text')
+    metrics.add_arguments(parser)
     args = parser.parse_args()
 
-    check_file_with_dict(args.input, args.output, args.corpus, cache_path=args.cache, top_n=args.top, max_distance=args.maxdist)
+    with metrics.session(args):
+        check_file_with_dict(args.input, args.output, args.corpus, cache_path=args.cache, top_n=args.top, max_distance=args.maxdist,
+                             use_deletes=not args.no_deletes, fallback=args.fallback, edits=args.edits,
+                             use_trie=args.trie, workers=args.workers, output_format=args.format,
+                             use_phonetic=args.phonetic, use_mmap=args.mmap)
@@ -1,6 +1,8 @@
 import os
 from typing import List, Tuple, Optional
 
+import metrics
+
 def _char_ngrams(s: str, n: int = 3):
     s = s or ''
     s = s.strip()
@@ -34,6 +36,14 @@ def try_load_embeddings(path: str):
         except Exception:
             return None
 
+_loaded_models = {}
+
+def load_embeddings(path: str):
+    """``try_load_embeddings`` once per process and path; later calls reuse the (memory-mapped) model."""
+    if path not in _loaded_models:
+        _loaded_models[path] = try_load_embeddings(path)
+    return _loaded_models[path]
+
 def semantic_similarity(word: str, candidate: str, model=None) -> float:
     """Return semantic similarity in range [0,1]. Uses model if available else char-ngram proxy."""
     if model is not None:
@@ -48,22 +58,55 @@ def semantic_similarity(word: str, candidate: str, model=None) -> float:
     # fallback proxy
     return char_ngram_similarity(word, candidate, n=3)
 
-def rerank_candidates(word: str, candidates: List[Tuple[str, int, int]], model=None, weight_semantic: float = 1.0) -> List[Tuple[str, int, int]]:
+def semantic_similarities(word: str, candidates: List[str], model=None, ngrams=None) -> List[float]:
+    """``semantic_similarity`` for many candidates at once.
+
+    In-vocabulary candidates are gathered from the vector matrix in one go and
+    scored with a single normalised dot product; only out-of-vocabulary words
+    fall back to the char-ngram proxy, read from ``ngrams`` (an
+    ``ngram_index.NgramIndex``) when one is given.
+    """
+    index = getattr(model, 'key_to_index', None)
+    vectors = getattr(model, 'vectors', None)
+    if ngrams is not None and (index is None or word not in index):
+        return ngrams.jaccards(word, candidates)
+    if index is None or vectors is None or word not in index:
+        return [semantic_similarity(word, c, model=model) for c in candidates]
+    import numpy as np
+    pos = [i for i, c in enumerate(candidates) if c in index]
+    sims = [None] * len(candidates)
+    if pos:
+        q = np.asarray(vectors[index[word]], dtype=np.float64)
+        m = np.asarray(vectors[[index[candidates[i]] for i in pos]], dtype=np.float64)
+        norms = np.linalg.norm(m, axis=1) * np.linalg.norm(q)
+        cos = np.divide(m @ q, norms, out=np.zeros(len(pos)), where=norms > 0)
+        for i, v, norm in zip(pos, cos, norms):
+            # a zero vector makes the per-pair similarity NaN, which clamps to 0.0 there
+            sims[i] = max(0.0, (float(v) + 1.0) / 2.0) if norm > 0 else 0.0
+    if ngrams is not None:
+        oov = [c for c, v in zip(candidates, sims) if v is None]
+        proxy = iter(ngrams.jaccards(word, oov))
+        return [next(proxy) if v is None else v for v in sims]
+    return [char_ngram_similarity(word, c, n=3) if v is None else v for c, v in zip(candidates, sims)]
+
+def rerank_candidates(word: str, candidates: List[Tuple[str, int, int]], model=None, weight_semantic: float = 1.0,
+                      ngrams=None) -> List[Tuple[str, int, int]]:
     """Given candidates as (candidate, dist, freq) produce a re-ranked list using semantic score.
 
     Lower score is better. We compute:
       score = dist*100 - min(freq,3000)/10 - semantic_norm*100*weight_semantic
     where semantic_norm in [0,1]
     """
-    scored = []
-    for c, dist, freq in candidates:
-        sem = semantic_similarity(word, c, model=model)
-        freq_bonus = min(freq, 3000) / 10.0
-        sem_bonus = sem * 100.0 * float(weight_semantic)
-        score = dist * 100.0 - freq_bonus - sem_bonus
-        scored.append((c, dist, freq, sem, score))
+    with metrics.timer('semantic.rerank'):
+        sems = semantic_similarities(word, [c for c, _, _ in candidates], model=model, ngrams=ngrams)
+        scored = []
+        for (c, dist, freq), sem in zip(candidates, sems):
+            freq_bonus = min(freq, 3000) / 10.0
+            sem_bonus = sem * 100.0 * float(weight_semantic)
+            score = dist * 100.0 - freq_bonus - sem_bonus
+            scored.append((c, dist, freq, sem, score))
 
-    # sort by score ascending, tie-breaker by higher freq
-    scored.sort(key=lambda x: (x[4], -x[2], x[0]))
+        # sort by score ascending, tie-breaker by higher freq
+        scored.sort(key=lambda x: (x[4], -x[2], x[0]))
     # return same shape as input (candidate, dist, freq)
     return [(c, d, f) for c, d, f, s, score in scored]
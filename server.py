@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Resident spell-check service (asyncio, JSON lines over a Unix or TCP socket)
+
+The dictionary and candidate indexes are loaded once at start-up. Each request
+is one JSON object per line and gets one JSON object back:
+
+    {"id": 1, "op": "check", "text": "..."}      -> {"id": 1, "lines": [...]}
+    {"id": 2, "op": "suggest", "word": "...", "top_n": 5}
+                                                  -> {"id": 2, "known": false, "suggestions": [...]}
+    {"id": 3, "op": "stats"}                      -> {"id": 3, "requests": ..., "p50_ms": ..., ...}
+
+Candidate generation runs in an executor so the event loop keeps accepting
+requests. Unknown words requested within ``--window`` milliseconds of each
+other are gathered into one batch, so a word shared by concurrent requests is
+computed once; finished words stay in an in-memory LRU. The words are
+computed by a ``SpellEngine``, so the server takes the same ranking options
+as the file runners. ``bench_server.py`` is a local load-test client.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from correction_cache import CorrectionCache
+from engine import SpellEngine, check_line
+from spell_checker import EDIT_MODES, FALLBACK_KINDS, Truncated, describe_candidates
+import parallel
+
+MAX_TOP = 20
+LATENCY_WINDOW = 10000
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+
+
+def percentile(sorted_values, q: float) -> float:
+    """Nearest-rank percentile (``q`` in 0..100) of an already sorted sequence."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(q / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+class MicroBatcher:
+    """Collects words asked for within ``window`` seconds and computes each distinct word once.
+
+    ``compute_many`` takes ``(word, deadline)`` pairs and returns ``{pair: candidates}``.
+    """
+
+    def __init__(self, compute_many, executor, window: float = 0.005, cache_size: int = 10000):
+        self.compute_many = compute_many
+        self.executor = executor
+        self.window = window
+        self.cache = CorrectionCache(max_size=cache_size)
+        self.batches = 0
+        self.computed = 0
+        self.truncated = 0
+        self._pending = {}
+        self._deadlines = {}
+        self._inflight = {}
+        self._timer = None
+
+    async def resolve(self, words, deadline=None):
+        """``{word: candidates}`` for every word, waiting for the batch that computes it.
+
+        ``deadline`` bounds the search of the words this call adds to a batch.
+        """
+        loop = asyncio.get_running_loop()
+        out = {}
+        waiting = {}
+        for w in words:
+            cached = self.cache.get(w)
+            if cached is not None:
+                out[w] = cached
+                continue
+            fut = self._pending.get(w) or self._inflight.get(w)
+            if fut is None:
+                fut = loop.create_future()
+                self._pending[w] = fut
+                self._deadlines[w] = deadline
+                if self._timer is None:
+                    self._timer = loop.call_later(self.window, self._flush)
+            waiting[w] = fut
+        for w, fut in waiting.items():
+            out[w] = await fut
+        return out
+
+    def _flush(self):
+        self._timer = None
+        batch, self._pending = self._pending, {}
+        deadlines, self._deadlines = self._deadlines, {}
+        self._inflight.update(batch)
+        asyncio.ensure_future(self._run(batch, deadlines))
+
+    async def _run(self, batch, deadlines):
+        loop = asyncio.get_running_loop()
+        self.batches += 1
+        self.computed += len(batch)
+        try:
+            items = [(w, deadlines[w]) for w in batch]
+            computed = await loop.run_in_executor(self.executor, self.compute_many, items)
+            results = {w: value for (w, _), value in computed.items()}
+        except Exception as e:
+            for fut in batch.values():
+                if not fut.done():
+                    fut.set_exception(e)
+        else:
+            for w, fut in batch.items():
+                # a cut-short result is served to this batch but not cached, so the word is searched again
+                if isinstance(results[w], Truncated):
+                    self.truncated += 1
+                else:
+                    self.cache.put(w, results[w])
+                if not fut.done():
+                    fut.set_result(results[w])
+        finally:
+            for w in batch:
+                self._inflight.pop(w, None)
+
+
+class SpellServer:
+
+    def __init__(self, engine, batcher, top_n=5):
+        self.engine = engine
+        self.freq_dict = engine.word_freq
+        self.batcher = batcher
+        self.top_n = top_n
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.errors = 0
+
+    async def check(self, text, top_n=None):
+        top_n = self.top_n if top_n is None else top_n
+        lines = [(i, ln.strip()) for i, ln in enumerate(text.splitlines(), 1)]
+        lines = [(i, ln) for i, ln in lines if ln]
+        if self.engine.line_budget is None:
+            found = await self.batcher.resolve(parallel.unknown_words((ln for _, ln in lines), self.freq_dict.__contains__))
+        else:
+            # one deadline per line, so the lines are resolved one after another
+            found = {}
+            for _, ln in lines:
+                deadline = time.perf_counter() + self.engine.line_budget
+                found.update(await self.batcher.resolve(parallel.unknown_words([ln], self.freq_dict.__contains__),
+                                                        deadline))
+
+        def suggest(word):
+            cands = found[word]
+            cands = type(cands)(cands[:top_n])
+            return cands, describe_candidates(word, cands)
+
+        context = self.engine.in_context if self.engine.bigrams is not None else None
+        return [check_line(i, ln, self.freq_dict, suggest, context) for i, ln in lines]
+
+    async def suggest(self, word, top_n=None):
+        top_n = self.top_n if top_n is None else top_n
+        if word in self.freq_dict:
+            return True, [], False
+        found = await self.batcher.resolve([word])
+        return False, [{'word': c, 'dist': d, 'freq': f} for c, d, f in found[word][:top_n]], isinstance(found[word], Truncated)
+
+    def stats(self):
+        lat = sorted(self.latencies)
+        cache = self.batcher.cache
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'p50_ms': round(percentile(lat, 50) * 1000, 3),
+            'p99_ms': round(percentile(lat, 99) * 1000, 3),
+            'batches': self.batcher.batches,
+            'words_computed': self.batcher.computed,
+            'truncated': self.batcher.truncated,
+            'cache_hits': cache.hits,
+            'cache_misses': cache.misses,
+        }
+
+    async def handle_request(self, req):
+        op = req.get('op')
+        top_n = req.get('top_n')
+        if top_n is not None:
+            top_n = max(1, min(int(top_n), MAX_TOP))
+        if op == 'check':
+            return {'lines': await self.check(req.get('text', ''), top_n)}
+        if op == 'suggest':
+            known, suggestions, truncated = await self.suggest(req.get('word', ''), top_n)
+            if truncated:
+                return {'known': known, 'suggestions': suggestions, 'truncated': True}
+            return {'known': known, 'suggestions': suggestions}
+        if op == 'stats':
+            return self.stats()
+        raise ValueError(f"unknown op: {op!r}")
+
+    async def _answer(self, raw, writer, lock):
+        start = time.perf_counter()
+        req_id = None
+        try:
+            req = json.loads(raw)
+            req_id = req.get('id')
+            resp = await self.handle_request(req)
+        except Exception as e:
+            self.errors += 1
+            resp = {'error': str(e)}
+        resp['id'] = req_id
+        async with lock:
+            writer.write((json.dumps(resp, ensure_ascii=False) + '\n').encode('utf-8'))
+            await writer.drain()
+        self.requests += 1
+        self.latencies.append(time.perf_counter() - start)
+
+    async def handle_connection(self, reader, writer):
+        # requests on one connection are answered concurrently; clients match replies by id
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                if not raw.strip():
+                    continue
+                task = asyncio.ensure_future(self._answer(raw, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except (ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+
+
+def build_server(index_file='index.pkl', top_n=5, workers=1, window_ms=5.0, use_mmap=False, **options):
+    """Load the dictionary and indexes once and return ``(SpellServer, SuggestPool)``.
+
+    ``options`` are ``SpellEngine`` options; replies are cut from its ``MAX_TOP`` candidates.
+    """
+    engine = SpellEngine.from_index(index_file, use_mmap=use_mmap, top_n=MAX_TOP, **options)
+
+    def compute(item):
+        word, deadline = item
+        return engine.compute(word, deadline)[0]
+
+    pool = parallel.SuggestPool(compute, workers)
+    executor = ThreadPoolExecutor(max_workers=max(2, workers))
+    batcher = MicroBatcher(pool.map, executor, window=window_ms / 1000.0)
+    return SpellServer(engine, batcher, top_n=top_n), pool
+
+
+async def serve(server, socket_path=None, host='127.0.0.1', port=None):
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        srv = await asyncio.start_unix_server(server.handle_connection, path=socket_path, limit=MAX_REQUEST_BYTES)
+        where = socket_path
+    else:
+        srv = await asyncio.start_server(server.handle_connection, host=host, port=port, limit=MAX_REQUEST_BYTES)
+        where = f"{host}:{port}"
+    print(f"Listening on {where}", file=sys.stderr, flush=True)
+    async with srv:
+        await srv.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Resident Hindi spell-check service (JSON lines)")
+    parser.add_argument('--socket', default=None, help='Unix socket path (default: TCP on --host/--port)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--index', default='index.pkl', help='Dictionary built by data_loader.py')
+    parser.add_argument('--fallback', choices=FALLBACK_KINDS, default='scan', help='Index used when no candidate is within distance 2')
+    parser.add_argument('--no-deletes', action='store_true', help='Generate edits1/edits2 strings instead of using the persisted deletion index')
+    parser.add_argument('--edits', choices=EDIT_MODES, default='codepoint', help='Edit generator used with --no-deletes')
+    parser.add_argument('--trie', action='store_true', help='Find candidates with one DAWG traversal instead of the deletes/fallback cascade')
+    parser.add_argument('--phonetic', action='store_true', help='Look up sound-alike spellings (phonetic key) before generating edits')
+    parser.add_argument('--mmap', action='store_true', help='Open the dictionary as a shared read-only memory map (<base>.dict.bin) instead of loading it')
+    parser.add_argument('--maxdist', type=int, default=4, help='Maximum edit distance to consider when scanning vocabulary')
+    parser.add_argument('--top', type=int, default=5, help='Default number of suggestions per word')
+    parser.add_argument('--workers', type=int, default=1, help='Processes used for candidate generation')
+    parser.add_argument('--window', type=float, default=5.0, help='Micro-batching window in milliseconds')
+    parser.add_argument('--context', action='store_true',
+                        help='Reorder candidates by title bigram counts with the neighbouring words (data_loader.py --bigrams)')
+    parser.add_argument('--context-weight', type=float, default=1.0,
+                        help='Edits of distance that ten bigram sightings are worth with --context')
+    parser.add_argument('--word-budget-ms', type=float, default=None,
+                        help='Stop the candidate search of one word after this long and keep the best found so far')
+    parser.add_argument('--line-budget-ms', type=float, default=None,
+                        help='Time budget shared by the unknown words of one line of a check request')
+    parser.add_argument('--long-word', type=int, default=None, metavar='N',
+                        help='Words longer than N characters skip edits2 and the full-vocabulary scan')
+    args = parser.parse_args()
+
+    try:
+        server, pool = build_server(args.index, use_deletes=not args.no_deletes, fallback=args.fallback, edits=args.edits,
+                                    use_trie=args.trie, max_distance=args.maxdist, top_n=args.top, workers=args.workers,
+                                    window_ms=args.window, use_phonetic=args.phonetic, use_mmap=args.mmap,
+                                    use_context=args.context, context_weight=args.context_weight,
+                                    word_budget_ms=args.word_budget_ms, line_budget_ms=args.line_budget_ms,
+                                    long_word=args.long_word)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+    print(f"Dictionary loaded: {len(server.freq_dict)} words", file=sys.stderr)
+    try:
+        asyncio.run(serve(server, socket_path=args.socket, host=args.host, port=args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.close()
+        server.engine.close()
+        print(json.dumps(server.stats()), file=sys.stderr)
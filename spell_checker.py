@@ -4,24 +4,32 @@ import sys
 import argparse
 import os
 import json
+import heapq
+import time
 
+import akshara
+import corpus_ingest
+import metrics
+import streaming
 
-def load_hindi_corpus(file_path, cache_path=None):
+
+def load_hindi_corpus(file_path, cache_path=None, use_mmap=False, workers=1):
+    if use_mmap:
+        import mmap_dict
+        source = cache_path if cache_path and os.path.exists(cache_path) else file_path
+        return mmap_dict.load_or_build(source, lambda: load_hindi_corpus(file_path, cache_path, workers=workers))
     if cache_path and os.path.exists(cache_path):
         try:
             with open(cache_path, 'r', encoding='utf-8') as cf:
                 data = json.load(cf)
-            return Counter({k: int(v) for k, v in data.items()})
+            return Counter(data)
         except Exception:
             pass
 
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"Corpus file not found: {file_path}")
 
-    with open(file_path, "r", encoding="utf-8") as f:
-        text = f.read()
-    words = re.findall(r'[\u0900-\u097F]+', text)
-    word_freq = Counter(words)
+    word_freq = corpus_ingest.count_words(file_path, workers=workers, progress=corpus_ingest.print_progress)
 
     if cache_path:
         try:
@@ -43,24 +51,84 @@ hindi_letters = [
     'ा', 'ि', 'ी', 'ु', 'ू', 'े', 'ै', 'ो', 'ौ', 'ं', 'ः', '़', '्'
 ]
 
-def levenshtein_distance(s1, s2):
+# Optimal string alignment distance (Levenshtein plus adjacent transpositions), computed
+# bit-parallel (Hyyro 2003): one machine-word-style integer per column instead of a
+# (len1+1)x(len2+1) matrix. With max_distance set, returns max_distance + 1 as soon as
+# the result is known to exceed it; distances within the cutoff are exact.
+def levenshtein_distance(s1, s2, max_distance=None):
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    len1, len2 = len(s1), len(s2)
+    if max_distance is not None and len1 - len2 > max_distance:
+        return max_distance + 1
+    if len2 == 0:
+        return len1
+    # the shorter string is the bit pattern, the longer one is scanned
+    peq = {}
+    bit = 1
+    for c in s2:
+        peq[c] = peq.get(c, 0) | bit
+        bit <<= 1
+    mask = (1 << len2) - 1
+    last = 1 << (len2 - 1)
+    vp, vn, d0, pm_prev = mask, 0, 0, 0
+    dist = len2
+    remaining = len1
+    for c in s1:
+        pm = peq.get(c, 0)
+        tr = (((~d0) & pm) << 1) & pm_prev
+        d0 = ((((pm & vp) + vp) ^ vp) | pm | vn | tr) & mask
+        hp = vn | (~(d0 | vp) & mask)
+        hn = d0 & vp
+        if hp & last:
+            dist += 1
+        elif hn & last:
+            dist -= 1
+        remaining -= 1
+        # each remaining character can lower the bottom row by at most one
+        if max_distance is not None and dist - remaining > max_distance:
+            return max_distance + 1
+        hp = ((hp << 1) | 1) & mask
+        hn = (hn << 1) & mask
+        vp = hn | (~(d0 | hp) & mask)
+        vn = d0 & hp
+        pm_prev = pm
+    return dist
+
+# Unrestricted Damerau-Levenshtein (Lowrance-Wagner). Unlike levenshtein_distance above
+# (optimal string alignment) it satisfies the triangle inequality, so it can key a BK-tree,
+# and it is never larger than levenshtein_distance for the same pair.
+def damerau_levenshtein_distance(s1, s2):
     len1, len2 = len(s1), len(s2)
-    dp = [[0]*(len2+1) for _ in range(len1+1)]
+    if not len1 or not len2:
+        return len1 + len2
+    # flat (len1+2)x(len2+2) matrix; row 0 and column 0 hold the sentinel
+    inf = len1 + len2
+    w = len2 + 2
+    dp = [inf] * ((len1+2) * w)
     for i in range(len1+1):
-        dp[i][0] = i
+        dp[(i+1)*w + 1] = i
     for j in range(len2+1):
-        dp[0][j] = j
+        dp[w + j+1] = j
+    last_row = {}
     for i in range(1, len1+1):
+        ci = s1[i-1]
+        last_col = 0
+        row, prev = (i+1)*w, i*w
         for j in range(1, len2+1):
-            cost = 0 if s1[i-1] == s2[j-1] else 1
-            dp[i][j] = min(
-                dp[i-1][j] + 1,      # deletion
-                dp[i][j-1] + 1,      # insertion
-                dp[i-1][j-1] + cost  # substitution
-            )
-            if i > 1 and j > 1 and s1[i-1] == s2[j-2] and s1[i-2] == s2[j-1]:
-                dp[i][j] = min(dp[i][j], dp[i-2][j-2] + cost)
-    return dp[len1][len2]
+            cj = s2[j-1]
+            i1 = last_row.get(cj, 0)
+            j1 = last_col
+            if ci == cj:
+                v = dp[prev + j]
+                last_col = j
+            else:
+                v = min(dp[prev + j], dp[row + j], dp[prev + j+1]) + 1
+            if i1 and j1:
+                v = min(v, dp[i1*w + j1] + (i - i1) + (j - j1) - 1)
+            dp[row + j+1] = v
+        last_row[ci] = i
+    return dp[(len1+1)*w + len2+1]
 
 # Generate edits1 for operation type detection and quick candidates
 def edits1(word):
@@ -71,6 +139,12 @@ def edits1(word):
     inserts = [L + c + R for L, R in splits for c in hindi_letters]
     return set(deletes + transposes + replaces + inserts)
 
+# Edit generators for the edits1/edits2 path: raw code points, or well-formed aksharas only
+EDIT_MODES = ('codepoint', 'akshara')
+
+def edit_function(mode):
+    return akshara.edits1_akshara if mode == 'akshara' else edits1
+
 # Quick check for known words
 def known(words, word_freq):
     return set(w for w in words if w in word_freq)
@@ -92,90 +166,288 @@ def operation_type(orig, cand):
                 return 'transposition'
     return None
 
-def generate_candidates(word, word_freq, max_distance=4):
+def describe_candidates(word, cands):
+    display = []
+    for cand, dist, freq in cands:
+        op = operation_type(word, cand) if dist == 1 else None
+        if op:
+            display.append(f"{cand} (dist={dist}, op={op}, freq={freq})")
+        else:
+            display.append(f"{cand} (dist={dist}, freq={freq})")
+    if isinstance(cands, Truncated):
+        display.append(TRUNCATED_NOTE)
+    return display
+
+# Time budgets. A search whose deadline (a time.perf_counter() value) passes stops at the
+# next tier boundary, scan step or index search step and returns what it has found, as a Truncated list.
+TRUNCATED_NOTE = "(time budget hit; best found so far)"
+
+class Truncated(list):
+    """Candidates of a search stopped by its deadline."""
+
+class DeadlineExceeded(Exception):
+    def __init__(self, partial):
+        super().__init__("deadline exceeded")
+        self.partial = partial
+
+def expired(deadline):
+    return deadline is not None and time.perf_counter() > deadline
+
+# Dictionary words within max_edit of word, found through a deletion index, as {word: dist}.
+# A hit is kept when its Damerau-Levenshtein distance is within max_edit, like the words
+# edits1/edits2 reach (a transposition plus an insertion is 2 edits, but 3 as OSA); the
+# reported distance is still the OSA one used for ranking.
+def known_within(word, deletes, max_edit=2):
+    found = {}
+    for cand in deletes.lookup(word, max_edit):
+        d = levenshtein_distance(word, cand, max_edit + 1)
+        if d <= max_edit or damerau_levenshtein_distance(word, cand) <= max_edit:
+            found[cand] = d
+    return found
+
+# Index answering the full-vocabulary fallback; 'scan' keeps the plain loop over word_freq
+FALLBACK_KINDS = ('scan', 'bktree', 'numpy', 'ngram')
+
+def load_vocab_index(kind, word_freq, source_path):
+    if kind == 'bktree':
+        import bk_tree
+        return bk_tree.load_or_build(word_freq, source_path)
+    if kind == 'ngram':
+        import ngram_index
+        return ngram_index.load_or_build(word_freq, source_path)
+    if kind == 'numpy':
+        import vocab_matrix
+        if vocab_matrix.available():
+            return vocab_matrix.VocabMatrix(word_freq)
+        print("numpy is not installed; falling back to a plain vocabulary scan", file=sys.stderr)
+    return None
+
+def _rank_key(cand):
+    return cand[1], -cand[2], cand[0]
+
+# (cand, dist, freq) sorted by distance, then frequency (descending), then the word itself.
+# With top_n, candidates are taken one distance at a time and ranked with a heap, so a
+# distance is never looked at once top_n better candidates are known; same top_n as a full sort.
+def rank_by_distance(dists, word_freq, top_n=None):
+    if top_n is None:
+        ranked = [(c, d, word_freq.get(c, 0)) for c, d in dists.items()]
+        ranked.sort(key=_rank_key)
+        return ranked
+    by_dist = {}
+    for c, d in dists.items():
+        by_dist.setdefault(d, []).append(c)
+    ranked = []
+    for d in sorted(by_dist):
+        need = top_n - len(ranked)
+        if need <= 0:
+            break
+        ranked.extend(heapq.nsmallest(need, ((c, d, word_freq.get(c, 0)) for c in by_dist[d]), key=_rank_key))
+    return ranked
+
+# Vocabulary scan within max_distance as {word: dist}. With top_n the cutoff drops to the
+# distance at which top_n words are already known, since nothing farther can outrank them.
+# With a deadline, DeadlineExceeded carries the words found before it passed.
+def scan_within(word, word_freq, max_distance, top_n=None, deadline=None):
+    dists = {}
+    per_dist = [0] * (max_distance + 1)
+    cutoff = max_distance
+    m = len(word)
+    for i, v in enumerate(word_freq):
+        if deadline is not None and not i % 1024 and time.perf_counter() > deadline:
+            raise DeadlineExceeded(dists)
+        if abs(len(v) - m) > cutoff:
+            continue
+        d = levenshtein_distance(word, v, cutoff)
+        if d <= cutoff:
+            dists[v] = d
+            if top_n is not None:
+                per_dist[d] += 1
+                total = 0
+                for k in range(cutoff + 1):
+                    total += per_dist[k]
+                    if total >= top_n:
+                        cutoff = k
+                        break
+    return dists
+
+def generate_candidates(word, word_freq, max_distance=4, deletes=None, vocab_index=None, edits='codepoint', trie=None,
+                        top_n=None, phonetic=None, deadline=None, long_word=None):
+    """Candidates for ``word`` as ``(cand, dist, freq)``, best first; only the best ``top_n`` if given.
+
+    Past ``deadline`` the search stops and returns a ``Truncated`` list of what it found.
+    Words longer than ``long_word`` characters skip edits2 and the vocabulary scan.
+    """
     cand_set = set()
-    cand_set |= known([word], word_freq)
-    cand_set |= known(edits1(word), word_freq)
-    if len(cand_set) == 0:
-        e2 = set(e2 for e1 in edits1(word) for e2 in edits1(e1))
-        cand_set |= known(e2, word_freq)
-    if not cand_set:
-        for v in word_freq:
-            d = levenshtein_distance(word, v)
-            if d <= max_distance:
-                cand_set.add(v)
-    candidates = []
-    for c in cand_set:
-        d = levenshtein_distance(word, c)
-        candidates.append((c, d, word_freq.get(c, 0)))
-    candidates.sort(key=lambda x: (x[1], -x[2], x[0]))
-    return candidates   
+    dists = {}
+    truncated = False
+    is_long = long_word is not None and len(word) > long_word
+    with metrics.timer('candidates.near'):
+        if phonetic is not None:
+            # sound-alikes first; when there are any, no edits are generated
+            dists = phonetic.within(word, max_distance)
+            cand_set |= set(dists)
+            tier = 'phonetic'
+        if not cand_set:
+            if trie is not None:
+                # one DAWG traversal covers all three tiers of the cascade below
+                try:
+                    dists = trie.search_tiered(word, max_distance, deadline)
+                except DeadlineExceeded as e:
+                    dists = e.partial
+                    truncated = True
+                cand_set |= set(dists)
+                tier = 'trie'
+            elif deletes is not None:
+                dists = known_within(word, deletes, max_edit=min(2, deletes.max_edit))
+                near = {c: d for c, d in dists.items() if d <= 1}
+                tier = 'deletes1'
+                if near:
+                    dists = near
+                elif dists:
+                    tier = 'deletes2'
+                cand_set |= set(dists)
+            else:
+                cand_set |= known([word], word_freq)
+                edit = edit_function(edits)
+                e1 = edit(word)
+                cand_set |= known(e1, word_freq)
+                tier = 'edits1'
+                if len(cand_set) == 0 and is_long:
+                    metrics.count('tier.skipped_long')
+                elif len(cand_set) == 0:
+                    tier = 'edits2'
+                    for w1 in e1:
+                        # one edits1 word expands to thousands of strings, so check before each
+                        if expired(deadline):
+                            truncated = True
+                            break
+                        cand_set.update(w for w in edit(w1) if w in word_freq)
+    if not cand_set and trie is None and not truncated:
+        with metrics.timer('candidates.fallback'):
+            if vocab_index is not None and not expired(deadline):
+                try:
+                    dists = dict(vocab_index.search(word, max_distance, deadline))
+                except DeadlineExceeded as e:
+                    dists = dict(e.partial)
+                    truncated = True
+                cand_set |= set(dists)
+                tier = 'index'
+            if not cand_set and not truncated and vocab_index is None:
+                if is_long:
+                    metrics.count('tier.skipped_long')
+                else:
+                    try:
+                        dists = scan_within(word, word_freq, max_distance, top_n, deadline)
+                    except DeadlineExceeded as e:
+                        dists = e.partial
+                        truncated = True
+                    cand_set |= set(dists)
+                    tier = 'scan'
+            truncated = truncated or (not cand_set and expired(deadline))
+    metrics.count('tier.' + tier if cand_set else 'tier.none')
+    with metrics.timer('candidates.rank'):
+        missing = [c for c in cand_set if c not in dists]
+        if missing and hasattr(vocab_index, 'score'):
+            dists.update(vocab_index.score(word, missing))
+        for c in missing:
+            if c not in dists:
+                dists[c] = levenshtein_distance(word, c)
+        candidates = rank_by_distance({c: dists[c] for c in cand_set}, word_freq, top_n)
+    if truncated:
+        metrics.count('candidates.truncated')
+        return Truncated(candidates)
+    return candidates
 
-# Process an input file (multiple sentences). Output per-line details and corrected sentences.
-def spell_check_file(input_path, output_path, corpus_path, top_n=5, max_distance=4, cache_path=None):
-    word_freq = load_hindi_corpus(corpus_path, cache_path=cache_path)
-    with open(input_path, 'r', encoding='utf-8') as f:
-        lines = [ln.rstrip('\n') for ln in f.readlines()]
-
-    results_lines = []
-    for idx, sentence in enumerate(lines, start=1):
-        tokens = re.findall(r'[\u0900-\u097F]+|[^\u0900-\u097F]+', sentence)
-        corrected_tokens = tokens[:]   
-        misspelled_info = [] 
-
-        for i, tok in enumerate(tokens):
-            if re.fullmatch(r'[\u0900-\u097F]+', tok):
-                word = tok
-                if word in word_freq:
-                    continue   
-                cand_tuples = generate_candidates(word, word_freq, max_distance=max_distance)
-                display_cands = []
-                for cand, dist, freq in cand_tuples[:top_n]:
-                    op = operation_type(word, cand) if dist == 1 else None
-                    if op:
-                        display_cands.append(f"{cand} (dist={dist}, op={op}, freq={freq})")
-                    else:
-                        display_cands.append(f"{cand} (dist={dist}, freq={freq})")
-                best = cand_tuples[0][0] if cand_tuples else None
-                misspelled_info.append({
-                    'word': word,
-                    'candidates': display_cands,
-                    'best': best
-                })
-                if best:
-                    corrected_tokens[i] = best
-        corrected_sentence = ''.join(corrected_tokens)
-        if misspelled_info:
-            results_lines.append(f"Line {idx} corrections:")
-            for info in misspelled_info:
-                results_lines.append(f"  Word: {info['word']}")
-                results_lines.append(f"  Suggestions: {', '.join(info['candidates'])}")
-                results_lines.append(f"  Best correction: {info['best']}")
-                results_lines.append("")
-        else:
-            results_lines.append(f"Line {idx}: No misspelled Hindi words.")
+# Report lines for one input line, shared by the titles-corpus runners
+def format_line_report(idx, sentence, corrected_sentence, misspelled_info):
+    out = []
+    if misspelled_info:
+        out.append(f"Line {idx} corrections:")
+        for info in misspelled_info:
+            out.append(f"  Word: {info['word']}")
+            out.append(f"  Suggestions: {', '.join(info['candidates'])}")
+            out.append(f"  Best correction: {info['best']}")
+            out.append("")
+    else:
+        out.append(f"Line {idx}: No misspelled Hindi words.")
+
+    out.append(f"Original (line {idx}): {sentence}")
+    out.append(f"Corrected (line {idx}): {corrected_sentence}")
+    out.append("-" * 60)
+    out.append("")
+    return out
 
-        results_lines.append(f"Original (line {idx}): {sentence}")
-        results_lines.append(f"Corrected (line {idx}): {corrected_sentence}")
-        results_lines.append("-" * 60)
-        results_lines.append("")
+# Report entries of format_line_report for a SpellEngine.check_line result: one per
+# occurrence of an unknown word, in line order, with the best candidate from found.
+def misspelled_occurrences(sentence, misspelled, found):
+    misspelled_info = []
+    for word in re.findall(r'[\u0900-\u097F]+', sentence):
+        if word in misspelled:
+            cands = found[word][0]
+            misspelled_info.append({
+                'word': word,
+                'candidates': misspelled[word],
+                'best': cands[0][0] if cands else None
+            })
+    return misspelled_info
 
-    with open(output_path, 'w', encoding='utf-8') as outf:
-        outf.write("Hindi Spell Checker - Detailed Output\n\n")
-        outf.write("\n".join(results_lines))
+# Process an input file (multiple sentences). Output per-line details and corrected sentences.
+# Lines are read, checked, formatted and written one at a time; '-' means stdin/stdout.
+# With workers > 1 the unknown words of each chunk of lines are corrected in a process pool.
+# Pass a SpellEngine as engine to reuse an already loaded corpus and its indexes.
+def spell_check_file(input_path, output_path, corpus_path, top_n=5, max_distance=4, cache_path=None, use_deletes=True,
+                     fallback='scan', edits='codepoint', use_trie=False, workers=1, engine=None, output_format='text',
+                     use_phonetic=False, use_mmap=False):
+    from engine import SpellEngine
+    own = engine is None
+    if own:
+        engine = SpellEngine.from_corpus(corpus_path, cache_path=cache_path, top_n=top_n, max_distance=max_distance,
+                                         use_deletes=use_deletes, fallback=fallback, edits=edits, use_trie=use_trie,
+                                         workers=workers, use_phonetic=use_phonetic, use_mmap=use_mmap)
+    try:
+        if output_format != 'text':
+            # this runner always applies the best candidate
+            with streaming.open_input(input_path) as f, streaming.open_records(output_path, output_format) as records:
+                for record in engine.flag_lines(f, apply=bool):
+                    records.write(record)
+        else:
+            with streaming.open_input(input_path) as f, streaming.open_output(output_path) as outf:
+                outf.write("Hindi Spell Checker - Detailed Output\n\n")
+                writer = streaming.JoinedWriter(outf)
+                numbered = ((idx, ln.rstrip('\n')) for idx, ln in enumerate(f, start=1))
+                for chunk, found in engine.resolve_chunks(numbered):
+                    for idx, sentence in chunk:
+                        # this runner always applies the best candidate
+                        result = engine.check_line(idx, sentence, found, apply=bool)
+                        misspelled_info = misspelled_occurrences(sentence, result['misspelled'], found)
+                        with metrics.timer('format'):
+                            writer.write_lines(format_line_report(idx, sentence, result['corrected'], misspelled_info))
+    finally:
+        if own:
+            engine.close()
 
-    print(f"✅ Done. Results saved to {output_path}")
+    streaming.status_printer(output_path)(f"✅ Done. Results saved to {output_path}")
 
 # If run as script, example usage
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Hindi spell checker using a titles corpus")
-    parser.add_argument('--input', '-i', default='input.txt', help='Input file with sentences (one per line)')
-    parser.add_argument('--output', '-o', default='output.txt', help='Output file for detailed results')
+    parser.add_argument('--input', '-i', default='input.txt', help="Input file with sentences (one per line); '-' for stdin")
+    parser.add_argument('--output', '-o', default='output.txt', help="Output file for detailed results; '-' for stdout")
     parser.add_argument('--corpus', '-c', default=os.path.join('hiwiki-latest-all-titles', 'hiwiki-latest-all-titles'),
                         help='Corpus file to build Hindi vocabulary (default: hiwiki titles included in repo)')
     parser.add_argument('--cache', default=os.path.join('output', 'corpus.json'), help='Optional cache for corpus word frequencies')
     parser.add_argument('--top', type=int, default=5, help='Top N suggestions to show per misspelled word')
     parser.add_argument('--maxdist', type=int, default=4, help='Maximum edit distance to consider when scanning vocabulary')
+    parser.add_argument('--no-deletes', action='store_true', help='Generate edits1/edits2 strings instead of using the persisted deletion index')
+    parser.add_argument('--edits', choices=EDIT_MODES, default='codepoint', help='Edit generator used with --no-deletes')
+    parser.add_argument('--trie', action='store_true', help='Find candidates with one DAWG traversal instead of the deletes/fallback cascade')
+    parser.add_argument('--phonetic', action='store_true', help='Look up sound-alike spellings (phonetic key) before generating edits')
+    parser.add_argument('--mmap', action='store_true', help='Open the dictionary as a shared read-only memory map (<base>.dict.bin) instead of loading it')
+    parser.add_argument('--fallback', choices=FALLBACK_KINDS, default='scan', help='Index used when no candidate is within distance 2')
+    parser.add_argument('--workers', type=int, default=1, help='Processes used for candidate generation')
+    parser.add_argument('--format', choices=streaming.OUTPUT_FORMATS, default='text',
+                        help='text report, or one JSON line / msgpack record per line with misspelled words')
+    metrics.add_arguments(parser)
     args = parser.parse_args()
 
     try:
@@ -184,7 +456,11 @@ if __name__ == "__main__":
         pass
 
     try:
-        spell_check_file(args.input, args.output, args.corpus, top_n=args.top, max_distance=args.maxdist, cache_path=args.cache)
+        with metrics.session(args):
+            spell_check_file(args.input, args.output, args.corpus, top_n=args.top, max_distance=args.maxdist, cache_path=args.cache,
+                             use_deletes=not args.no_deletes, fallback=args.fallback, edits=args.edits,
+                             use_trie=args.trie, workers=args.workers, output_format=args.format,
+                             use_phonetic=args.phonetic, use_mmap=args.mmap)
     except FileNotFoundError as e:
         print(str(e))
         sys.exit(2)
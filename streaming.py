@@ -0,0 +1,107 @@
+"""
+Helpers for the line-streaming runners
+
+Input is read lazily line by line and output is written as it is produced, so
+memory stays flat no matter how large the input is. A path of ``-`` means
+stdin/stdout; status messages then go to stderr so they do not mix with the
+report.
+
+``--format jsonl`` (or ``msgpack``, when the msgpack package is installed)
+replaces the text report with one record per line that has flagged words;
+see ``open_records``.
+"""
+
+import json
+import sys
+from contextlib import contextmanager
+
+try:
+    import msgpack
+except ImportError:  # optional, for --format msgpack
+    msgpack = None
+
+FLUSH_EVERY = 100
+OUTPUT_FORMATS = ('text', 'jsonl', 'msgpack')
+
+
+@contextmanager
+def open_input(path):
+    if path == '-':
+        yield sys.stdin
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield f
+
+
+@contextmanager
+def open_output(path):
+    if path == '-':
+        yield sys.stdout
+        sys.stdout.flush()
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            yield f
+
+
+def status_printer(output_path):
+    """``print`` for progress messages, sent to stderr when the report goes to stdout."""
+    if output_path == '-':
+        return lambda *args, **kw: print(*args, file=sys.stderr, **kw)
+    return print
+
+
+class JoinedWriter:
+    """Writes items exactly like ``out.write("\\n".join(items))`` without holding them."""
+
+    def __init__(self, out, flush_every: int = FLUSH_EVERY):
+        self.out = out
+        self.flush_every = flush_every
+        self._first = True
+        self._blocks = 0
+
+    def write_lines(self, items):
+        for item in items:
+            if self._first:
+                self._first = False
+            else:
+                self.out.write("\n")
+            self.out.write(item)
+        self._blocks += 1
+        if self._blocks % self.flush_every == 0:
+            self.out.flush()
+
+
+class RecordWriter:
+    """Writes one record per call: a JSON line, or a msgpack object to a binary stream."""
+
+    def __init__(self, out, fmt: str = 'jsonl', flush_every: int = FLUSH_EVERY):
+        self.out = out
+        self.fmt = fmt
+        self.flush_every = flush_every
+        self.count = 0
+
+    def write(self, record):
+        if self.fmt == 'msgpack':
+            self.out.write(msgpack.packb(record, use_bin_type=True))
+        else:
+            self.out.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self.out.flush()
+
+
+@contextmanager
+def open_records(path, fmt: str = 'jsonl'):
+    """``RecordWriter`` on ``path`` ('-' for stdout); msgpack falls back to JSON lines if it is not installed."""
+    if fmt == 'msgpack' and msgpack is None:
+        print("msgpack is not installed; writing JSON lines instead", file=sys.stderr)
+        fmt = 'jsonl'
+    if fmt != 'msgpack':
+        with open_output(path) as out:
+            yield RecordWriter(out, fmt)
+    elif path == '-':
+        yield RecordWriter(sys.stdout.buffer, fmt)
+        sys.stdout.buffer.flush()
+    else:
+        with open(path, 'wb') as out:
+            yield RecordWriter(out, fmt)
@@ -0,0 +1,56 @@
+"""
+Tests for the BK-tree fallback: ``search`` against the full scan, the
+deadline, and patching the persisted tree
+"""
+
+import pickle
+import time
+
+import pytest
+
+import bk_tree
+import derived_cache
+from data_loader import add_common_words
+from spell_checker import DeadlineExceeded, scan_within
+
+WORDS = add_common_words() + [
+    'प्रधानमंत्री', 'संबोधन', 'पर्यटन', 'स्थल', 'बाजार', 'खरीदी', 'नीति', 'शहर', 'मौसम', 'सुंदर',
+    'कमल', 'कलम', 'फुटबॉल', 'विद्यालय', 'पुस्तकालय',
+]
+# deletions, insertions, substitutions, transpositions (OSA and Damerau-Levenshtein differ on
+# परट्न -> पर्यटन) and words far from everything
+QUERIES = ['ुस्तकालय', 'बाज़ार', 'नीत', 'सहर', 'मोसम', 'कमला', 'लकम', 'परट्न', 'फटुबॉल', 'हिदीं', 'teh', 'क',
+           'ीीऩाऱव', 'विद्यालयों']
+
+
+@pytest.mark.parametrize('max_distance', [0, 1, 2, 3, 4])
+def test_search_matches_scan(max_distance):
+    word_freq = dict.fromkeys(WORDS, 1)
+    tree = bk_tree.BKTree(sorted(word_freq))
+    assert tree.size == len(word_freq)
+    for q in QUERIES:
+        assert sorted(tree.search(q, max_distance)) == sorted(scan_within(q, word_freq, max_distance).items())
+
+
+def test_search_past_deadline():
+    tree = bk_tree.BKTree(WORDS)
+    with pytest.raises(DeadlineExceeded) as e:
+        tree.search('सहर', 4, deadline=time.perf_counter() - 1)
+    assert e.value.partial == []
+
+
+def test_patch_adds_words(tmp_path):
+    source = str(tmp_path / 'index.pkl')
+    word_freq = dict.fromkeys(WORDS, 1)
+    with open(source, 'wb') as f:
+        pickle.dump(word_freq, f)
+    bk_tree.load_or_build(word_freq, source)
+    stamp = derived_cache.source_stamp(source)
+
+    grown = dict(word_freq, पर्यटक=1, कमलनाथ=1)
+    with open(source, 'wb') as f:
+        pickle.dump(grown, f)
+    assert bk_tree.patch(grown, source, stamp, len(word_freq), ['पर्यटक', 'कमलनाथ'])
+    tree = derived_cache.load(derived_cache.derived_path(source, 'bktree'), source_path=source, vocab_size=len(grown))
+    assert tree.size == len(grown)
+    assert ('पर्यटक', 1) in tree.search('पर्यटन', 1)
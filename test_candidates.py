@@ -0,0 +1,110 @@
+"""
+Parity tests for the candidate search
+
+The bit-parallel OSA kernel is checked against the plain DP, and the
+deletion index and the DAWG against a brute-force scan with the kernel and
+against the ``--no-deletes`` edits cascade. Run with ``python -m pytest -q``.
+"""
+
+from collections import Counter
+
+import pytest
+
+from akshara import is_devanagari
+from data_loader import add_common_words
+from deletion_index import DeletionIndex
+from spell_checker import (damerau_levenshtein_distance, generate_candidates, hindi_letters, known_within,
+                           levenshtein_distance)
+from trie import DAWG
+
+WORDS = add_common_words() + [
+    'प्रधानमंत्री', 'संबोधन', 'पर्यटन', 'स्थल', 'बाजार', 'खरीदी', 'नीति', 'शहर', 'मौसम', 'सुंदर',
+    'आसमान', 'बादल', 'फुटबॉल', 'मैदान', 'बच्चे', 'भारत', 'हिंदी', 'भाषा', 'विद्यालय', 'पुस्तकालय',
+]
+WORD_FREQ = Counter({w: 1 + (i * 37) % 500 for i, w in enumerate(dict.fromkeys(WORDS))})
+
+# edits1/edits2 insert and replace whole entries of hindi_letters, so they agree with the
+# indexes only on words spelled with its single-code-point entries: they miss ँ or ॉ, and
+# reach a word with क्ष or ज्ञ in fewer edits than its code-point distance
+_LETTERS = {c for c in hindi_letters if len(c) == 1}
+_CLUSTERS = [c for c in hindi_letters if len(c) > 1]
+EDIT_FREQ = Counter({w: n for w, n in WORD_FREQ.items()
+                     if not is_devanagari(w) or (set(w) <= _LETTERS and not any(c in w for c in _CLUSTERS))})
+
+
+def _variants(word):
+    """A deletion, an insertion, a substitution, a transposition and a double edit of ``word``."""
+    out = [word[1:], word[:1] + 'क' + word[1:], 'स' + word[1:]]
+    if len(word) > 1:
+        out.append(word[1] + word[0] + word[2:])
+    out.append(word[:-1] + 'ा' + 'ं')
+    return out
+
+
+# the runners only look up Devanagari tokens; a Latin query could reach the Latin
+# dictionary entries by deletion or transposition, which the indexes leave to the scan tier
+QUERIES = sorted({v for w in list(WORD_FREQ)[::3] for v in _variants(w) if is_devanagari(v)} - set(WORD_FREQ)) + [
+    'ीीऩाऱव', 'तिषझबीळेिङ', 'क', 'ऑ',
+    # पर्यटन by a transposition plus an insertion: 2 edits, but OSA distance 3
+    'परट्न',
+]
+
+
+def levenshtein_distance_dp(s1, s2):
+    """Optimal string alignment distance with the full matrix (the pre-bit-parallel implementation)."""
+    len1, len2 = len(s1), len(s2)
+    dp = [[0] * (len2 + 1) for _ in range(len1 + 1)]
+    for i in range(len1 + 1):
+        dp[i][0] = i
+    for j in range(len2 + 1):
+        dp[0][j] = j
+    for i in range(1, len1 + 1):
+        for j in range(1, len2 + 1):
+            cost = 0 if s1[i-1] == s2[j-1] else 1
+            dp[i][j] = min(dp[i-1][j] + 1, dp[i][j-1] + 1, dp[i-1][j-1] + cost)
+            if i > 1 and j > 1 and s1[i-1] == s2[j-2] and s1[i-2] == s2[j-1]:
+                dp[i][j] = min(dp[i][j], dp[i-2][j-2] + cost)
+    return dp[len1][len2]
+
+
+def _within(query, words, bound):
+    return {w: d for w in words for d in [levenshtein_distance_dp(query, w)] if d <= bound}
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_osa_kernel_matches_dp(query):
+    for word in WORD_FREQ:
+        expected = levenshtein_distance_dp(query, word)
+        assert levenshtein_distance(query, word) == expected
+        assert levenshtein_distance(word, query) == expected
+        for bound in range(4):
+            # within the bound the distance is exact, beyond it the result is bound + 1
+            assert levenshtein_distance(query, word, bound) == min(expected, bound + 1)
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_deletion_index_matches_scan(query):
+    devanagari = [w for w in WORD_FREQ if is_devanagari(w)]
+    deletes = DeletionIndex.build(devanagari)
+    for bound in (1, 2):
+        # kept by Damerau-Levenshtein distance, reported with the OSA distance
+        expected = {w: levenshtein_distance_dp(query, w) for w in devanagari
+                    if damerau_levenshtein_distance(query, w) <= bound}
+        assert known_within(query, deletes, bound) == expected
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_dawg_matches_scan(query):
+    dawg = DAWG(WORD_FREQ)
+    for bound in range(4):
+        assert dawg.search(query, bound) == _within(query, WORD_FREQ, bound)
+    deletes = DeletionIndex.build(w for w in WORD_FREQ if is_devanagari(w))
+    assert generate_candidates(query, WORD_FREQ, trie=dawg) == generate_candidates(query, WORD_FREQ, deletes=deletes)
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_indexes_match_edits_cascade(query):
+    expected = generate_candidates(query, EDIT_FREQ)
+    deletes = DeletionIndex.build(w for w in EDIT_FREQ if is_devanagari(w))
+    assert generate_candidates(query, EDIT_FREQ, deletes=deletes) == expected
+    assert generate_candidates(query, EDIT_FREQ, trie=DAWG(EDIT_FREQ)) == expected
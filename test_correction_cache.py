@@ -0,0 +1,86 @@
+"""
+Tests for the correction cache: namespaces, the in-process LRU and the sqlite store
+"""
+
+import sqlite3
+
+from correction_cache import CorrectionCache, cache_namespace
+
+VALUE = [[['पर्यटन', 1, 40]], ['पर्यटन (dist=1, freq=40)']]
+
+
+def test_namespace_follows_dictionary_and_parameters(tmp_path):
+    path = str(tmp_path / 'index.pkl')
+    with open(path, 'wb') as f:
+        f.write(b'one')
+    ns = cache_namespace(path, max_distance=4, fallback='scan')
+    assert ns == cache_namespace(path, fallback='scan', max_distance=4)
+    assert ns != cache_namespace(path, max_distance=3, fallback='scan')
+    assert ns != cache_namespace(path, max_distance=4, fallback='bktree')
+    with open(path, 'wb') as f:
+        f.write(b'rebuilt')
+    assert ns != cache_namespace(path, max_distance=4, fallback='scan')
+
+
+def test_lru_is_bounded():
+    cache = CorrectionCache(max_size=2)
+    cache.put('क', 1)
+    cache.put('ख', 2)
+    assert cache.get('क') == 1
+    cache.put('ग', 3)
+    # ख was the least recently used
+    assert cache.get('ख') is None
+    assert (cache.get('क'), cache.get('ग')) == (1, 3)
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_store_keeps_namespaces_apart(tmp_path):
+    db = str(tmp_path / 'cache.db')
+    a = CorrectionCache('a', path=db)
+    a.put('परटन', VALUE)
+    a.put('सहर', VALUE, persist=False)
+    a.close()
+    b = CorrectionCache('b', path=db)
+    assert b.get('परटन') is None
+    b.put('परटन', [[], []])
+    b.close()
+
+    a = CorrectionCache('a', path=db)
+    assert a.get('परटन') == VALUE
+    assert a.get('सहर') is None
+    a.close()
+    b = CorrectionCache('b', path=db)
+    assert b.get('परटन') == [[], []]
+    b.close()
+
+
+def test_store_drops_oldest_rows_beyond_max_rows(tmp_path):
+    db = str(tmp_path / 'cache.db')
+    for ns in ('a', 'b'):
+        cache = CorrectionCache(ns, path=db)
+        for i in range(3):
+            cache.put(f'{ns}{i}', i)
+        cache.close()
+    cache = CorrectionCache('b', path=db, max_rows=4)
+    cache.close()
+    rows = sqlite3.connect(db).execute("SELECT namespace, word FROM corrections").fetchall()
+    # the newest rows stay, whichever namespace wrote them
+    assert len(rows) == 4 and {('b', 'b0'), ('b', 'b1'), ('b', 'b2')} < set(rows)
+
+
+def test_store_without_timestamps_is_migrated(tmp_path):
+    db = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE corrections (namespace TEXT NOT NULL, word TEXT NOT NULL, value TEXT NOT NULL, "
+                 "PRIMARY KEY (namespace, word))")
+    conn.execute("INSERT INTO corrections VALUES ('a', 'पुराना', '1')")
+    conn.commit()
+    conn.close()
+    cache = CorrectionCache('a', path=db)
+    assert cache.get('पुराना') == 1
+    cache.put('नया', 2)
+    cache.close()
+    cache = CorrectionCache('a', path=db, max_rows=1)
+    # the row from before the migration counts as the oldest
+    assert cache.get('पुराना') is None and cache.get('नया') == 2
+    cache.close()
@@ -0,0 +1,70 @@
+"""
+Tests for incremental re-checking: reused lines must give the same results as a full check
+"""
+
+import pickle
+
+import pytest
+
+import incremental
+from data_loader import add_common_words
+from engine import SpellEngine
+
+WORDS = add_common_words() + ['पर्यटन', 'स्थल', 'शहर', 'बाजार', 'मौसम', 'सुंदर']
+LINES = [
+    'हमारे सहर मे बहुत सारे परटन स्थल है',
+    'आज मौसम सुंदर है',
+    '',
+    'बाजर में भीड़ है',
+]
+
+
+@pytest.fixture
+def index_file(tmp_path):
+    path = str(tmp_path / 'index.pkl')
+    with open(path, 'wb') as f:
+        pickle.dump({w: 1 + (i * 37) % 500 for i, w in enumerate(dict.fromkeys(WORDS))}, f)
+    return path
+
+
+def _run(engine, lines, path):
+    manifest = incremental.Manifest(path, incremental.results_key(engine))
+    results = list(incremental.check_lines(engine, lines, manifest))
+    manifest.save()
+    return results, manifest
+
+
+def test_reused_lines_match_a_full_check(index_file, tmp_path):
+    path = incremental.manifest_path(str(tmp_path / 'out.txt'))
+    engine = SpellEngine.from_index(index_file)
+    results, manifest = _run(engine, LINES, path)
+    assert results == list(engine.check_lines(LINES))
+    assert (manifest.checked, manifest.reused) == (3, 0)
+
+    # one line edited, one inserted in front: the others are reused under their new numbers
+    edited = ['नया सहर'] + LINES[:1] + ['आज मौसम सुंदर था'] + LINES[2:]
+    engine = SpellEngine.from_index(index_file)
+    results, manifest = _run(engine, edited, path)
+    assert results == list(engine.check_lines(edited))
+    assert (manifest.checked, manifest.reused) == (2, 2)
+
+    results, manifest = _run(engine, edited, path)
+    assert (manifest.checked, manifest.reused) == (0, 4)
+
+
+def test_other_settings_start_over(index_file, tmp_path):
+    path = incremental.manifest_path(str(tmp_path / 'out.txt'))
+    _run(SpellEngine.from_index(index_file), LINES, path)
+    engine = SpellEngine.from_index(index_file, max_distance=2)
+    results, manifest = _run(engine, LINES, path)
+    assert results == list(engine.check_lines(LINES))
+    assert (manifest.checked, manifest.reused) == (3, 0)
+
+
+def test_truncated_results_are_not_stored(tmp_path):
+    manifest = incremental.Manifest(str(tmp_path / 'm.json'), 'key')
+    result = {'line_number': 1, 'original': 'परटन', 'corrected': 'परटन', 'misspelled': {'परटन': []}}
+    manifest.store(result, truncated={'परटन'})
+    assert manifest.lookup('परटन') is None
+    manifest.store(result)
+    assert manifest.lookup('परटन') == {'corrected': 'परटन', 'misspelled': {'परटन': []}}
@@ -0,0 +1,50 @@
+"""
+Tests for the memory-mapped dictionary (``.dict.bin``)
+"""
+
+import os
+import pickle
+from collections import Counter
+
+import mmap_dict
+from data_loader import add_common_words
+
+WORDS = add_common_words() + ['प्रधानमंत्री', 'संबोधन', 'पर्यटन', 'फुटबॉल', 'विद्यालय', 'ऑ']
+WORD_FREQ = Counter({w: 1 + (i * 37) % 500 for i, w in enumerate(dict.fromkeys(WORDS))})
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'words.dict.bin')
+    mmap_dict.write(path, WORD_FREQ)
+    d = mmap_dict.open_dict(path)
+    try:
+        assert list(d) == list(WORD_FREQ)
+        assert dict(d.items()) == dict(WORD_FREQ)
+        assert len(d) == len(WORD_FREQ)
+        for w, n in WORD_FREQ.items():
+            assert w in d and d[w] == n and d.get(w) == n
+        for q in ('पर्यटक', 'कौां', 'teh', ''):
+            assert q not in d and d.get(q) is None
+    finally:
+        d.close()
+
+
+def test_load_or_build_rewrites_stale_file(tmp_path):
+    source = str(tmp_path / 'index.pkl')
+    with open(source, 'wb') as f:
+        pickle.dump(WORD_FREQ, f)
+    d = mmap_dict.load_or_build(source, lambda: WORD_FREQ)
+    assert dict(d.items()) == dict(WORD_FREQ)
+    d.close()
+
+    changed = Counter(WORD_FREQ, पर्यटक=7)
+    with open(source, 'wb') as f:
+        pickle.dump(changed, f)
+    st = os.stat(source)
+    os.utime(source, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert mmap_dict.open_dict(mmap_dict.path_for(source), source) is None
+    d = mmap_dict.load_or_build(source, lambda: changed)
+    try:
+        assert d['पर्यटक'] == 7 and len(d) == len(changed)
+    finally:
+        d.close()
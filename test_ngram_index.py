@@ -0,0 +1,68 @@
+"""
+Tests for the trigram index: ``search`` against the full scan, and the
+Jaccard similarities against ``char_ngram_similarity``
+"""
+
+import random
+
+import pytest
+
+from data_loader import add_common_words
+from ngram_index import NgramIndex
+from semantic_rank import char_ngram_similarity
+from spell_checker import scan_within
+
+WORDS = add_common_words() + [
+    'प्रधानमंत्री', 'संबोधन', 'पर्यटन', 'स्थल', 'बाजार', 'खरीदी', 'नीति', 'शहर', 'मौसम', 'सुंदर',
+    'कमल', 'कलमकार', 'विद्यालय', 'पुस्तकालय', 'ाााााा', 'अ',
+]
+
+
+def _queries(words, count=150, seed=7):
+    rng = random.Random(seed)
+    letters = 'कखगरसपतनमािीुेोंय्'
+    out = []
+    for _ in range(count):
+        w = list(rng.choice(words))
+        for _ in range(rng.randrange(1, 5)):
+            i = rng.randrange(len(w) + 1)
+            if rng.random() < 0.5 and i < len(w):
+                del w[i]
+            else:
+                w.insert(i, rng.choice(letters))
+        out.append(''.join(w))
+    return out
+
+
+def test_closer_word_without_shared_trigram():
+    # कमल is one transposition away and shares no trigram with the query; कलमकार shares one
+    index = NgramIndex(['कमल', 'कलमकार'])
+    assert sorted(index.search('कलम', 4)) == [('कमल', 1), ('कलमकार', 3)]
+
+
+@pytest.mark.parametrize('max_distance', [0, 1, 2, 3, 4])
+def test_search_matches_scan(max_distance):
+    word_freq = dict.fromkeys(WORDS, 1)
+    index = NgramIndex(word_freq)
+    for q in _queries(WORDS):
+        assert sorted(index.search(q, max_distance)) == sorted(scan_within(q, word_freq, max_distance).items())
+
+
+def test_search_after_remove_and_add():
+    index = NgramIndex(WORDS)
+    removed = WORDS[::4]
+    index.remove(removed)
+    index.add(['कमला', 'पर्यटक'])
+    remaining = [w for w in WORDS if w not in removed] + ['कमला', 'पर्यटक']
+    word_freq = dict.fromkeys(remaining, 1)
+    for q in _queries(remaining, count=60):
+        assert sorted(index.search(q, 3)) == sorted(scan_within(q, word_freq, 3).items())
+
+
+def test_jaccards_match_char_ngram_similarity():
+    index = NgramIndex(WORDS)
+    for q in _queries(WORDS, count=30):
+        # the last two are not in the index and take the set path
+        cands = WORDS[:20] + ['कमला', 'xyz']
+        expected = [char_ngram_similarity(q, c) for c in cands]
+        assert index.jaccards(q, cands) == pytest.approx(expected)
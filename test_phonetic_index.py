@@ -0,0 +1,45 @@
+"""
+Tests for the phonetic-key index and its tier in ``generate_candidates``
+"""
+
+from deletion_index import DeletionIndex
+from phonetic_index import PhoneticIndex, phonetic_key
+from spell_checker import generate_candidates
+
+WORD_FREQ = {'हिंदी': 900, 'शहर': 500, 'सहर': 3, 'पूजा': 300, 'संबंध': 200, 'ज़मीन': 100, 'कमल': 50, 'school': 10}
+
+
+def test_key_folds_confusable_spellings():
+    assert phonetic_key('हिन्दी') == phonetic_key('हिंदी') == phonetic_key('हीँदि')
+    assert phonetic_key('सहर') == phonetic_key('शहर') == phonetic_key('षहर')
+    assert phonetic_key('पुजा') == phonetic_key('पूजा')
+    assert phonetic_key('सम्बन्ध') == phonetic_key('संबंध')
+    # nukta as a precomposed letter and as a combining mark
+    assert phonetic_key('जमीन') == phonetic_key('\u095Bमीन') == phonetic_key('ज\u093Cमीन')
+    assert phonetic_key('कमल') != phonetic_key('कलम')
+
+
+def test_within_skips_the_word_and_far_matches():
+    index = PhoneticIndex.build(WORD_FREQ)
+    assert 'school' not in {w for bucket in index.table.values() for w in bucket}
+    assert index.within('शहर', 4) == {'सहर': 1}
+    assert index.within('हीँदि', 4) == {'हिंदी': 3}
+    assert index.within('हीँदि', 2) == {}
+
+
+def test_remove_and_add():
+    index = PhoneticIndex.build(WORD_FREQ)
+    index.remove(['सहर', 'शहर'])
+    assert index.lookup('सहर') == []
+    index.add(['शहर'])
+    assert index.lookup('सहर') == ['शहर']
+
+
+def test_phonetic_tier_comes_first():
+    deletes = DeletionIndex.build(w for w in WORD_FREQ if w != 'school')
+    phonetic = PhoneticIndex.build(WORD_FREQ)
+    # three edits away, so the cascade alone only reaches it through the full scan
+    assert generate_candidates('हिन्दि', WORD_FREQ, deletes=deletes, phonetic=phonetic) == [('हिंदी', 3, 900)]
+    # no sound-alike: the usual cascade answers
+    assert (generate_candidates('कमला', WORD_FREQ, deletes=deletes, phonetic=phonetic)
+            == generate_candidates('कमला', WORD_FREQ, deletes=deletes))
@@ -0,0 +1,115 @@
+"""
+Tests for the spell-check service: micro-batching, and replies that match the file runners
+"""
+
+import asyncio
+import json
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import parallel
+from data_loader import add_common_words
+from engine import SpellEngine
+from server import MicroBatcher, build_server
+from spell_checker import Truncated
+
+WORDS = add_common_words() + ['पर्यटन', 'स्थल', 'शहर', 'बाजार', 'मौसम', 'सुंदर']
+TEXT = 'हमारे सहर मे बहुत सारे परटन स्थल है\n\nबाजर में भीड़ है, सहर में'
+
+
+@pytest.fixture
+def index_file(tmp_path):
+    path = str(tmp_path / 'index.pkl')
+    with open(path, 'wb') as f:
+        pickle.dump({w: 1 + (i * 37) % 500 for i, w in enumerate(dict.fromkeys(WORDS))}, f)
+    return path
+
+
+@pytest.fixture
+def server(index_file):
+    server, pool = build_server(index_file, window_ms=1.0)
+    yield server
+    pool.close()
+    server.engine.close()
+
+
+def _batcher(results):
+    calls = []
+    lock = threading.Lock()
+
+    def compute_many(items):
+        with lock:
+            calls.append(sorted(w for w, _ in items))
+        return {item: results(item[0]) for item in items}
+
+    return MicroBatcher(compute_many, ThreadPoolExecutor(1), window=0.01), calls
+
+
+def test_batcher_computes_each_word_once():
+    batcher, calls = _batcher(lambda w: [(w + 'ा', 1, 1)])
+
+    async def run():
+        first = await asyncio.gather(batcher.resolve(['क', 'ख']), batcher.resolve(['ख', 'ग']))
+        again = await batcher.resolve(['क', 'ग'])
+        return first, again
+
+    (a, b), again = asyncio.run(run())
+    assert calls == [['क', 'ख', 'ग']]
+    assert a == {'क': [('का', 1, 1)], 'ख': [('खा', 1, 1)]} and b['ग'] == [('गा', 1, 1)]
+    assert again == {'क': [('का', 1, 1)], 'ग': [('गा', 1, 1)]}
+    assert (batcher.batches, batcher.computed) == (1, 3)
+
+
+def test_batcher_does_not_cache_truncated_results():
+    batcher, calls = _batcher(lambda w: Truncated())
+
+    async def run():
+        return [await batcher.resolve(['क']) for _ in range(2)]
+
+    results = asyncio.run(run())
+    assert all(isinstance(r['क'], Truncated) for r in results)
+    assert len(calls) == 2 and batcher.truncated == 2
+
+
+def test_replies_match_the_engine(server, index_file):
+    engine = SpellEngine.from_index(index_file)
+    lines = asyncio.run(server.handle_request({'op': 'check', 'text': TEXT}))['lines']
+    assert lines == list(engine.check_lines(TEXT.splitlines()))
+
+    reply = asyncio.run(server.handle_request({'op': 'suggest', 'word': 'सहर', 'top_n': 3}))
+    expected = engine.suggest('सहर')[0][:3]
+    assert reply == {'known': False, 'suggestions': [{'word': c, 'dist': d, 'freq': f} for c, d, f in expected]}
+    assert asyncio.run(server.handle_request({'op': 'suggest', 'word': 'शहर'})) == {'known': True, 'suggestions': []}
+    with pytest.raises(ValueError):
+        asyncio.run(server.handle_request({'op': 'nothing'}))
+
+
+def test_json_lines_over_a_socket(server):
+    async def run():
+        srv = await asyncio.start_server(server.handle_connection, host='127.0.0.1', port=0)
+        port = srv.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        requests = [{'id': 1, 'op': 'suggest', 'word': 'परटन'}, {'id': 2, 'op': 'check', 'text': TEXT},
+                    {'id': 3, 'op': 'bogus'}, {'id': 4, 'op': 'suggest', 'word': 'परटन'}]
+        for req in requests:
+            writer.write((json.dumps(req, ensure_ascii=False) + '\n').encode('utf-8'))
+        writer.write(b'not json\n')
+        await writer.drain()
+        replies = [json.loads(await reader.readline()) for _ in range(len(requests) + 1)]
+        writer.close()
+        srv.close()
+        await srv.wait_closed()
+        return replies
+
+    replies = {r['id']: r for r in asyncio.run(run())}
+    assert replies[1] == replies[4] | {'id': 1}
+    assert replies[1]['suggestions'][0]['word'] == 'पर्यटन'
+    assert len(replies[2]['lines']) == 2
+    assert 'error' in replies[3] and 'error' in replies[None]
+    stats = server.stats()
+    assert stats['errors'] == 2
+    # each unknown word is computed once, whichever request asked for it first
+    assert stats['words_computed'] == len(set(parallel.unknown_words(TEXT.splitlines(), server.freq_dict.__contains__)))
@@ -0,0 +1,45 @@
+"""
+Tests for the NumPy vocabulary matrix against the scalar distance and the full scan
+"""
+
+import time
+
+import pytest
+
+pytest.importorskip('numpy')
+
+import vocab_matrix
+from data_loader import add_common_words
+from spell_checker import DeadlineExceeded, levenshtein_distance, rank_by_distance, scan_within
+
+WORDS = add_common_words() + [
+    'प्रधानमंत्री', 'संबोधन', 'पर्यटन', 'स्थल', 'बाजार', 'खरीदी', 'नीति', 'शहर', 'मौसम', 'सुंदर',
+    'कमल', 'कलम', 'फुटबॉल', 'विद्यालय', 'पुस्तकालय',
+]
+WORD_FREQ = {w: 1 + (i * 37) % 500 for i, w in enumerate(dict.fromkeys(WORDS))}
+QUERIES = ['ुस्तकालय', 'बाज़ार', 'नीत', 'सहर', 'मोसम', 'कमला', 'लकम', 'परट्न', 'फटुबॉल', 'हिदीं', 'teh', 'क',
+           'ीीऩाऱव', 'विद्यालयों', '']
+
+
+@pytest.mark.parametrize('chunk_rows', [65536, 3])
+@pytest.mark.parametrize('max_distance', [0, 1, 2, 4])
+def test_candidates_match_scan(max_distance, chunk_rows):
+    matrix = vocab_matrix.VocabMatrix(WORD_FREQ, chunk_rows=chunk_rows)
+    assert len(matrix) == len(WORD_FREQ)
+    for q in QUERIES:
+        expected = rank_by_distance(scan_within(q, WORD_FREQ, max_distance), WORD_FREQ)
+        assert matrix.candidates(q, max_distance) == expected
+        assert sorted(matrix.search(q, max_distance)) == sorted((c, d) for c, d, _ in expected)
+
+
+def test_score_matches_levenshtein_distance():
+    matrix = vocab_matrix.VocabMatrix(WORD_FREQ)
+    for q in QUERIES:
+        assert matrix.score(q, WORDS) == {w: levenshtein_distance(q, w) for w in WORDS}
+
+
+def test_search_past_deadline():
+    matrix = vocab_matrix.VocabMatrix(WORD_FREQ)
+    with pytest.raises(DeadlineExceeded) as e:
+        matrix.search('सहर', 4, deadline=time.perf_counter() - 1)
+    assert e.value.partial == []
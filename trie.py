@@ -0,0 +1,191 @@
+"""
+Vocabulary as a minimised DAWG, searched with a prefix-sharing edit-distance DP
+
+The vocabulary is stored as a directed acyclic word graph (a prefix trie whose
+identical suffix subtrees are merged, built incrementally from sorted words).
+A search walks the graph depth-first and keeps one optimal-string-alignment DP
+row per prefix, so every word sharing that prefix reuses the row. A branch is
+abandoned as soon as the smallest value in its row exceeds the bound, so the
+cost follows the number of nodes visited, not the vocabulary size.
+
+``search_tiered`` reproduces the edits1 -> edits2 -> full scan cascade of
+``generate_candidates`` in a single traversal: the bound starts at
+``max(max_distance, 3)`` and tightens to 3, then 1, as closer words are found.
+The edits2 tier holds the words within Damerau-Levenshtein distance 2, and a
+transposition plus an insertion is 3 in OSA, so that tier keeps OSA-3 words
+whose Damerau-Levenshtein distance is 2. As in the cascade, only all-Devanagari
+words count for the distance-1/2 tiers; other entries are returned only by the
+full-vocabulary tier.
+"""
+
+from typing import Dict, Iterable
+
+import derived_cache
+from akshara import is_devanagari
+from spell_checker import DeadlineExceeded, damerau_levenshtein_distance, expired
+
+
+class _Node:
+    __slots__ = ('edges', 'final')
+
+    def __init__(self):
+        self.edges = {}
+        self.final = False
+
+    def signature(self):
+        return self.final, tuple((c, id(n)) for c, n in sorted(self.edges.items()))
+
+    def __getstate__(self):
+        return self.edges, self.final
+
+    def __setstate__(self, state):
+        self.edges, self.final = state
+
+
+class DAWG:
+
+    def __init__(self, words: Iterable[str] = ()):
+        self.root = _Node()
+        self.size = 0
+        self.node_count = 1
+        register = {}
+        unchecked = []  # (parent, char, child) along the path of the previous word
+        prev = ''
+
+        def minimize(down_to):
+            while len(unchecked) > down_to:
+                parent, c, child = unchecked.pop()
+                sig = child.signature()
+                existing = register.get(sig)
+                if existing is not None:
+                    parent.edges[c] = existing
+                else:
+                    register[sig] = child
+
+        for w in sorted(set(words)):
+            if not w:
+                continue
+            common = 0
+            for a, b in zip(w, prev):
+                if a != b:
+                    break
+                common += 1
+            minimize(common)
+            node = unchecked[-1][2] if unchecked else self.root
+            for c in w[common:]:
+                child = _Node()
+                node.edges[c] = child
+                unchecked.append((node, c, child))
+                node = child
+            node.final = True
+            self.size += 1
+            prev = w
+        minimize(0)
+        self.node_count += len(register)
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, word):
+        node = self.root
+        for c in word:
+            node = node.edges.get(c)
+            if node is None:
+                return False
+        return node.final
+
+    def search(self, word: str, max_distance: int, deadline=None) -> Dict[str, int]:
+        """Every word within ``max_distance`` of ``word`` as ``{candidate: distance}``.
+
+        Past ``deadline``, DeadlineExceeded carries the words found so far (for both searches).
+        """
+        return self._search(word, max_distance, tiered=False, deadline=deadline)
+
+    def search_tiered(self, word: str, max_distance: int, deadline=None) -> Dict[str, int]:
+        """Candidates of the nearest tier (<=1, else <=2, else <=max_distance), like the cascade."""
+        return self._search(word, max(max_distance, 3), tiered=True, max_distance=max_distance, deadline=deadline)
+
+    def _search(self, word, bound, tiered, max_distance=None, deadline=None):
+        m = len(word)
+        found = {}
+        limit = [bound]
+        # nearest tier found so far: 1, 2 or None
+        tier = [None]
+        visits = [0]
+        cols = range(1, m + 1)
+
+        def visit(node, prefix, ch, prev_ch, row, prev_row):
+            visits[0] += 1
+            if not visits[0] % 256 and expired(deadline):
+                raise _Expired
+            cur = [row[0] + 1]
+            left = cur[0]
+            for i in cols:
+                qc = word[i-1]
+                v = row[i-1]
+                if qc != ch:
+                    if row[i] < v:
+                        v = row[i]
+                    if left < v:
+                        v = left
+                    v += 1
+                    if prev_row is not None and i > 1 and qc == prev_ch and word[i-2] == ch and prev_row[i-2] + 1 < v:
+                        v = prev_row[i-2] + 1
+                cur.append(v)
+                left = v
+            if node.final and left <= limit[0]:
+                found[prefix] = left
+                if tiered and left <= 3 and is_devanagari(prefix):
+                    if left <= 1:
+                        tier[0] = limit[0] = 1
+                    elif tier[0] is None and (left <= 2 or damerau_levenshtein_distance(word, prefix) <= 2):
+                        tier[0] = 2
+                        limit[0] = 3
+            # OSA rows never decrease in their minimum along a path, so this prune is exact
+            lowest = min(cur)
+            if lowest > limit[0]:
+                return
+            # follow the query's next character first so close words tighten the bound early
+            depth = len(prefix)
+            nxt = word[depth] if depth < m else None
+            child = node.edges.get(nxt)
+            if child is not None:
+                visit(child, prefix + nxt, nxt, ch, cur, row)
+            for c, child in node.edges.items():
+                if c != nxt and lowest <= limit[0]:
+                    visit(child, prefix + c, c, ch, cur, row)
+
+        first = list(range(m + 1))
+        head = word[0] if word else None
+        stopped = False
+        try:
+            child = self.root.edges.get(head)
+            if child is not None:
+                visit(child, head, head, None, first, None)
+            for c, child in self.root.edges.items():
+                if c != head:
+                    visit(child, c, c, None, first, None)
+        except _Expired:
+            stopped = True
+
+        if not tiered:
+            result = found
+        elif tier[0] is None:
+            result = {w: d for w, d in found.items() if d <= max_distance}
+        elif tier[0] == 1:
+            result = {w: d for w, d in found.items() if d <= 1 and is_devanagari(w)}
+        else:
+            result = {w: d for w, d in found.items() if is_devanagari(w) and d <= 3
+                      and (d <= 2 or damerau_levenshtein_distance(word, w) <= 2)}
+        if stopped:
+            raise DeadlineExceeded(result)
+        return result
+
+
+class _Expired(Exception):
+    """Unwinds the recursive traversal when the deadline passes."""
+
+
+def load_or_build(word_freq, source_path: str) -> DAWG:
+    """Load the graph persisted next to ``source_path``, rebuilding it if stale."""
+    return derived_cache.load_or_build('dawg', source_path, lambda: DAWG(word_freq), vocab_size=len(word_freq))
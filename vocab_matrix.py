@@ -0,0 +1,120 @@
+"""
+NumPy-encoded vocabulary with batched distance scoring
+
+The vocabulary is grouped by length, and each group is stored as an integer
+code-point matrix (one row per word) with a parallel frequency array. A query
+is scored against a whole group at once: the optimal-string-alignment DP
+advances one column for every row with array operations, and the insertion
+chain inside a column is a cumulative minimum. So the Python-level loop runs
+over character positions, not over words.
+
+numpy is optional; ``available()`` reports whether it can be used.
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from spell_checker import DeadlineExceeded, expired
+
+
+def available() -> bool:
+    return np is not None
+
+
+def _encode(words: List[str], length: int):
+    if length == 0:
+        return np.zeros((len(words), 0), dtype=np.int32)
+    buf = ''.join(words).encode('utf-32-le')
+    return np.frombuffer(buf, dtype=np.uint32).reshape(len(words), length).astype(np.int32)
+
+
+class VocabMatrix:
+
+    def __init__(self, word_freq, chunk_rows: int = 65536):
+        if np is None:
+            raise ImportError("numpy is required for VocabMatrix")
+        by_len: Dict[int, List[str]] = {}
+        for w in word_freq:
+            by_len.setdefault(len(w), []).append(w)
+        self.chunk_rows = chunk_rows
+        # length -> (words, codes[n, length], freqs[n])
+        self.buckets = {}
+        for length, words in by_len.items():
+            words.sort()
+            freqs = np.fromiter((word_freq.get(w, 0) for w in words), dtype=np.int64, count=len(words))
+            self.buckets[length] = (words, _encode(words, length), freqs)
+
+    def __len__(self):
+        return sum(len(b[0]) for b in self.buckets.values())
+
+    def _bucket_distances(self, query, codes):
+        """OSA distance from ``query`` (int32[m]) to every row of ``codes`` (int32[n, l])."""
+        n, length = codes.shape
+        m = len(query)
+        if m == 0:
+            return np.full(n, length, dtype=np.int32)
+        offs = np.arange(1, m+1, dtype=np.int32)
+        prev2 = None
+        eq_prev = None
+        prev = np.broadcast_to(np.arange(m+1, dtype=np.int32), (n, m+1))
+        for j in range(1, length+1):
+            eq = codes[:, j-1, None] == query[None, :]
+            cost = (~eq).astype(np.int32)
+            base = np.minimum(prev[:, :-1] + cost, prev[:, 1:] + 1)
+            if prev2 is not None and m > 1:
+                trans = eq_prev[:, 1:] & eq[:, :-1]
+                base[:, 1:] = np.where(trans, np.minimum(base[:, 1:], prev2[:, :-2] + cost[:, 1:]), base[:, 1:])
+            # cur[i] = min(base[i], cur[i-1] + 1) with cur[0] = j, i.e. a running minimum of base - i
+            run = np.minimum.accumulate(np.minimum(base - offs, j), axis=1)
+            cur = np.empty((n, m+1), dtype=np.int32)
+            cur[:, 0] = j
+            cur[:, 1:] = run + offs
+            prev2, prev, eq_prev = prev, cur, eq
+        return prev[:, m]
+
+    def search(self, word: str, max_distance: int, deadline=None) -> List[Tuple[str, int]]:
+        """Return ``(candidate, distance)`` for every word within ``max_distance``."""
+        try:
+            return [(c, d) for c, d, f in self.candidates(word, max_distance, deadline)]
+        except DeadlineExceeded as e:
+            raise DeadlineExceeded([(c, d) for c, d, f in e.partial])
+
+    def candidates(self, word: str, max_distance: int, deadline=None) -> List[Tuple[str, int, int]]:
+        """``(candidate, dist, freq)`` within ``max_distance``, sorted like ``generate_candidates``.
+
+        The deadline is checked before each block of rows; past it, DeadlineExceeded carries the sorted
+        candidates found so far.
+        """
+        query = np.array([ord(c) for c in word], dtype=np.int32)
+        m = len(word)
+        found = []
+        for length in range(max(0, m - max_distance), m + max_distance + 1):
+            bucket = self.buckets.get(length)
+            if bucket is None:
+                continue
+            words, codes, freqs = bucket
+            for start in range(0, len(words), self.chunk_rows):
+                if expired(deadline):
+                    found.sort(key=lambda x: (x[1], -x[2], x[0]))
+                    raise DeadlineExceeded(found)
+                dist = self._bucket_distances(query, codes[start:start + self.chunk_rows])
+                for k in np.nonzero(dist <= max_distance)[0].tolist():
+                    found.append((words[start + k], int(dist[k]), int(freqs[start + k])))
+        found.sort(key=lambda x: (x[1], -x[2], x[0]))
+        return found
+
+    def score(self, word: str, candidates: Iterable[str]) -> Dict[str, int]:
+        """Distances from ``word`` to an arbitrary candidate set, one batch per length."""
+        query = np.array([ord(c) for c in word], dtype=np.int32)
+        by_len: Dict[int, List[str]] = {}
+        for c in candidates:
+            by_len.setdefault(len(c), []).append(c)
+        result = {}
+        for length, words in by_len.items():
+            dist = self._bucket_distances(query, _encode(words, length))
+            result.update(zip(words, dist.tolist()))
+        return result